@@ -0,0 +1,147 @@
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from crossword import *
+from dictionary import Dictionary
+from generate import CrosswordCreator
+
+
+# Dictionary shared by every puzzle solved in this process
+dictionary = None
+
+
+def init_worker(source):
+    """
+    Load the shared dictionary in a worker process. `source` is the path of
+    the compiled dictionary, which is memory-mapped so that every worker
+    shares the same pages, or the compiled bytes if there is no such file.
+    """
+    global dictionary
+    if isinstance(source, str):
+        dictionary = Dictionary.open(source)
+    else:
+        dictionary = Dictionary(source)
+
+
+def read_manifest(filename):
+    """
+    Read a manifest file into a list of (structure, output) jobs.
+    Each non-empty line holds a structure file and an output file;
+    lines starting with "#" are ignored.
+    """
+    jobs = []
+    with open(filename) as f:
+        for number, line in enumerate(f, 1):
+            fields = line.split()
+            if not fields or fields[0].startswith("#"):
+                continue
+            if len(fields) != 2:
+                sys.exit(f"{filename}:{number}: expected 'structure output'")
+            jobs.append((fields[0], fields[1]))
+    return jobs
+
+
+def write_assignment(crossword, assignment, filename):
+    """
+    Write an assignment to a JSON file, as a list of words with the
+    position, direction and length of the variable each one fills.
+    """
+    words = [
+        {
+            "i": var.i,
+            "j": var.j,
+            "direction": var.direction,
+            "length": var.length,
+            "word": word
+        }
+        for var, word in sorted(
+            assignment.items(), key=lambda item: (item[0].i, item[0].j)
+        )
+    ]
+    with open(filename, "w") as f:
+        json.dump({
+            "height": crossword.height,
+            "width": crossword.width,
+            "words": words
+        }, f, indent=2)
+
+
+def generate(job, backjumping=False, cell_size=100):
+    """
+    Solve one (structure, output) job with the shared dictionary.
+    The assignment is written as JSON next to `output`, and `output` itself
+    is rendered unless it is the JSON file.
+    Return a tuple (structure, output, solved, solve time, total time).
+    """
+    structure, output = job
+    start = time.perf_counter()
+
+    crossword = Crossword(structure, dictionary)
+    creator = CrosswordCreator(crossword)
+    solving = time.perf_counter()
+    assignment = creator.solve(backjumping=backjumping)
+    solved = time.perf_counter()
+
+    if assignment is not None:
+        root, extension = os.path.splitext(output)
+        write_assignment(crossword, assignment, root + ".json")
+        if extension != ".json":
+            creator.save(assignment, output, cell_size)
+
+    return (
+        structure, output, assignment is not None,
+        solved - solving, time.perf_counter() - start
+    )
+
+
+def generate_job(arguments):
+    """Unpack the arguments of a pool task for `generate`."""
+    return generate(*arguments)
+
+
+def main():
+    # Options are separated from the positional arguments
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    options = dict(
+        arg[2:].partition("=")[::2] for arg in sys.argv[1:]
+        if arg.startswith("--")
+    )
+
+    # Checks if the command has been entered correctly.
+    if len(args) != 2:
+        sys.exit("Incorrect command!!! Must enter in following format -> python batch.py manifest words [--processes=N] [--backjump] [--cell-size=N]")
+
+    jobs = read_manifest(args[0])
+    processes = int(options.get("processes") or os.cpu_count())
+    backjumping = "backjump" in options
+    cell_size = int(options.get("cell-size") or 100)
+
+    # Dictionary is compiled once and shared with every worker
+    start = time.perf_counter()
+    shared = Dictionary.load(args[1])
+    source = shared.path or bytes(shared.buffer)
+
+    with multiprocessing.Pool(
+        processes, initializer=init_worker, initargs=(source,)
+    ) as pool:
+        solve_time = 0
+        results = pool.imap_unordered(
+            generate_job, [(job, backjumping, cell_size) for job in jobs]
+        )
+        for structure, output, solved, solving, total in results:
+            solve_time += solving
+            if solved:
+                print(f"{structure} -> {output} ({solving:.3f}s solve, {total:.3f}s total)")
+            else:
+                print(f"{structure}: No solution.")
+
+    elapsed = time.perf_counter() - start
+    print(f"{len(jobs)} puzzles in {elapsed:.3f}s with {processes} processes "
+          f"({solve_time:.3f}s solving)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
+from dictionary import Dictionary
+
+
 class Variable():
 
     ACROSS = "across"
@@ -57,9 +60,12 @@ class Crossword():
                         row.append(False)
                 self.structure.append(row)
 
-        # Save vocabulary list
-        with open(words_file) as f:
-            self.words = set(f.read().upper().splitlines())
+        # Load vocabulary list from its compiled, length-bucketed form,
+        # unless an already loaded dictionary is being shared
+        if isinstance(words_file, Dictionary):
+            self.words = words_file
+        else:
+            self.words = Dictionary.load(words_file)
 
         # Determine variable set
         self.variables = set()
@@ -0,0 +1,247 @@
+import hashlib
+import mmap
+import os
+import struct
+
+
+class Dictionary():
+    """
+    Word list bucketed by length, with a positional letter index.
+
+    The compiled form is a binary file that is memory-mapped on load, and is
+    cached next to the source word list, keyed by the SHA-256 hash of the
+    source file. Buckets are only decoded the first time they are needed.
+
+    File layout (all integers little-endian):
+        header:  magic, version, source hash, number of buckets
+        buckets: (length, count, words offset, words size,
+                  index offset, index entries) per bucket
+        words:   newline-separated UTF-8 words of each bucket
+        index:   (position, codepoint, bitset offset) entries per bucket,
+                 each pointing at a bitset with one bit per word
+    """
+
+    MAGIC = b"CWDX"
+    VERSION = 1
+    CACHE_DIR = "__wordcache__"
+
+    HEADER = struct.Struct("<4sH32sI")
+    BUCKET = struct.Struct("<IIQQQI")
+    ENTRY = struct.Struct("<IIQ")
+
+    def __init__(self, buffer, path=None):
+        """
+        Create a dictionary from a compiled buffer, memory-mapped from
+        `path` if it came from a file.
+        """
+        self.buffer = buffer
+        self.path = path
+        magic, version, self.digest, n = Dictionary.HEADER.unpack_from(buffer)
+        if magic != Dictionary.MAGIC or version != Dictionary.VERSION:
+            raise ValueError("not a compiled crossword dictionary")
+
+        # Bucket table, by word length
+        self.table = dict()
+        offset = Dictionary.HEADER.size
+        for _ in range(n):
+            entry = Dictionary.BUCKET.unpack_from(buffer, offset)
+            self.table[entry[0]] = entry[1:]
+            offset += Dictionary.BUCKET.size
+
+        self.buckets = dict()
+        self.sets = dict()
+        self.indexes = dict()
+        self.matches = dict()
+        self.letters_at = dict()
+
+    def __contains__(self, word):
+        return word in self.of_length(len(word))
+
+    def __iter__(self):
+        for length in sorted(self.table):
+            yield from self.of_length(length)
+
+    def __len__(self):
+        return sum(entry[0] for entry in self.table.values())
+
+    def lengths(self):
+        """Return the sorted word lengths present in the dictionary."""
+        return sorted(self.table)
+
+    def words(self, length):
+        """Return the words of a given length, in file order."""
+        if length not in self.table:
+            return ()
+        if length not in self.buckets:
+            count, offset, size, _, _ = self.table[length]
+            data = bytes(self.buffer[offset:offset + size])
+            self.buckets[length] = tuple(data.decode("utf-8").split("\n"))
+        return self.buckets[length]
+
+    def of_length(self, length):
+        """
+        Return the frozen set of words of a given length.
+        The same object is returned on every call, so it can be shared as
+        a read-only domain.
+        """
+        if length not in self.sets:
+            self.sets[length] = frozenset(self.words(length))
+        return self.sets[length]
+
+    def with_letter(self, length, position, letter):
+        """
+        Return the frozen set of words of a given length that have `letter`
+        at `position`. Each set is decoded from its bitset once, and the
+        same object is returned on later calls.
+        """
+        key = (length, position, letter)
+        if key in self.matches:
+            return self.matches[key]
+        offset = self.index(length).get((position, ord(letter)))
+        if offset is None:
+            return frozenset()
+
+        count = self.table[length][0]
+        bits = int.from_bytes(
+            self.buffer[offset:offset + (count + 7) // 8], "little"
+        )
+        words = self.words(length)
+        matches = set()
+        while bits:
+            low = bits & -bits
+            matches.add(words[low.bit_length() - 1])
+            bits ^= low
+        self.matches[key] = frozenset(matches)
+        return self.matches[key]
+
+    def letters(self, length, position):
+        """
+        Return the frozen set of letters that words of a given length have
+        at `position`, read from the index without looking at the words.
+        """
+        key = (length, position)
+        if key not in self.letters_at:
+            self.letters_at[key] = frozenset(
+                chr(codepoint) for at, codepoint in self.index(length)
+                if at == position
+            )
+        return self.letters_at[key]
+
+    def index(self, length):
+        """
+        Return the positional index of a bucket, as a dict from (position,
+        codepoint) to the offset of its bitset, or an empty dict if there
+        are no words of that length.
+        """
+        if length not in self.table:
+            return dict()
+        if length not in self.indexes:
+            self.indexes[length] = self.read_index(length)
+        return self.indexes[length]
+
+    def read_index(self, length):
+        """Return the positional index of a bucket as a dict."""
+        _, _, _, offset, entries = self.table[length]
+        index = dict()
+        for _ in range(entries):
+            position, codepoint, bitset = Dictionary.ENTRY.unpack_from(
+                self.buffer, offset
+            )
+            index[position, codepoint] = bitset
+            offset += Dictionary.ENTRY.size
+        return index
+
+    @classmethod
+    def compile(cls, words, digest=bytes(32)):
+        """Return the compiled binary form of an iterable of words."""
+        buckets = dict()
+        for word in sorted(set(words)):
+            if word:
+                buckets.setdefault(len(word), []).append(word)
+
+        # Encode every bucket's words and positional bitsets
+        sections = []
+        for length in sorted(buckets):
+            bucket = buckets[length]
+            width = (len(bucket) + 7) // 8
+            index = dict()
+            for n, word in enumerate(bucket):
+                for position, letter in enumerate(word):
+                    key = (position, ord(letter))
+                    if key not in index:
+                        index[key] = bytearray(width)
+                    index[key][n // 8] |= 1 << (n % 8)
+            sections.append((
+                length, bucket,
+                "\n".join(bucket).encode("utf-8"),
+                sorted(index.items())
+            ))
+
+        # Lay out the sections after the header and bucket table
+        offset = cls.HEADER.size + cls.BUCKET.size * len(sections)
+        header = [cls.HEADER.pack(cls.MAGIC, cls.VERSION, digest, len(sections))]
+        body = []
+        for length, bucket, data, index in sections:
+            words_offset = offset
+            offset += len(data)
+            index_offset = offset
+            offset += cls.ENTRY.size * len(index)
+
+            header.append(cls.BUCKET.pack(
+                length, len(bucket), words_offset, len(data),
+                index_offset, len(index)
+            ))
+            body.append(data)
+
+            entries = []
+            bitsets = []
+            for (position, codepoint), bits in index:
+                entries.append(cls.ENTRY.pack(position, codepoint, offset))
+                bitsets.append(bytes(bits))
+                offset += len(bits)
+            body.extend(entries)
+            body.extend(bitsets)
+
+        return b"".join(header + body)
+
+    @classmethod
+    def load(cls, words_file, cache_dir=None):
+        """
+        Load the dictionary for `words_file`, compiling it into the cache
+        directory first if there is no compiled file for its current
+        contents. If the cache cannot be written, the dictionary is built
+        in memory instead.
+        """
+        with open(words_file, "rb") as f:
+            source = f.read()
+        digest = hashlib.sha256(source).digest()
+
+        if cache_dir is None:
+            cache_dir = os.path.join(
+                os.path.dirname(os.path.abspath(words_file)), cls.CACHE_DIR
+            )
+        path = os.path.join(
+            cache_dir,
+            f"{os.path.basename(words_file)}.{digest.hex()[:16]}.cwd"
+        )
+
+        if not os.path.exists(path):
+            words = source.decode("utf-8").upper().splitlines()
+            compiled = cls.compile(words, digest)
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                temp = f"{path}.{os.getpid()}.tmp"
+                with open(temp, "wb") as f:
+                    f.write(compiled)
+                os.replace(temp, path)
+            except OSError:
+                return cls(compiled)
+
+        return cls.open(path)
+
+    @classmethod
+    def open(cls, path):
+        """Memory-map a compiled dictionary file."""
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer, path)
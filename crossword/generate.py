@@ -1,8 +1,58 @@
 import sys
-from PIL import Image, ImageDraw, ImageFont
+from collections import OrderedDict
 from termcolor import cprint
 
 from crossword import *
+from render import Renderer
+
+
+class NogoodStore():
+    """
+    Bounded store of nogoods: partial assignments, as frozensets of
+    (variable, word) pairs, that are known to have no complete extension.
+    When the store is full, the least recently used nogood is evicted.
+    """
+
+    def __init__(self, limit=10000):
+        self.limit = limit
+        self.nogoods = OrderedDict()
+        self.index = dict()
+
+    def __len__(self):
+        return len(self.nogoods)
+
+    def add(self, nogood):
+        """
+        Record `nogood`, evicting the least recently used nogood if the
+        store is over its limit.
+        """
+        nogood = frozenset(nogood)
+        if not nogood or nogood in self.nogoods:
+            return
+        self.nogoods[nogood] = None
+        for pair in nogood:
+            self.index.setdefault(pair, set()).add(nogood)
+
+        while len(self.nogoods) > self.limit:
+            evicted, _ = self.nogoods.popitem(last=False)
+            for pair in evicted:
+                self.index[pair].discard(evicted)
+                if not self.index[pair]:
+                    del self.index[pair]
+
+    def violated(self, assignment, var, value):
+        """
+        Return a nogood that would hold if `var` were assigned `value` on
+        top of `assignment`, or None if there is no such nogood.
+        """
+        for nogood in self.index.get((var, value), ()):
+            if all(
+                v == var or assignment.get(v) == word
+                for v, word in nogood
+            ):
+                self.nogoods.move_to_end(nogood)
+                return nogood
+        return None
 
 
 class CrosswordCreator():
@@ -13,7 +63,7 @@ class CrosswordCreator():
         """
         self.crossword = crossword
         self.domains = {
-            variable: self.crossword.words.copy()
+            variable: self.crossword.words.of_length(variable.length)
             for variable in self.crossword.variables
         }
 
@@ -54,54 +104,50 @@ class CrosswordCreator():
                     cprint("█ ", "blue", end="")
             print()
 
-    def save(self, assignment, filename):
+    def save(self, assignment, filename, cell_size=100):
         """
-        Save crossword assignment to an image file.
+        Save crossword assignment to an image file, or to an SVG or text
+        file if `filename` ends in .svg or .txt.
         """
-        size = 100
-        border = 2
-        interior = size - 2 * border
-        letters = self.letter_grid(assignment)
-
-        # Create a blank canvas
-        img = Image.new(
-            "RGBA",
-            (self.crossword.width * size,
-             self.crossword.height * size),
-            "black"
+        Renderer(cell_size).save(
+            self.crossword.structure, self.letter_grid(assignment), filename
         )
-        font = ImageFont.truetype("assets/fonts/OpenSans-Regular.ttf", 80)
-        draw = ImageDraw.Draw(img)
-
-        for x in range(self.crossword.height):
-            for y in range(self.crossword.width):
 
-                rect = [
-                    (y * size + border,
-                     x * size + border),
-                    ((y + 1) * size - border,
-                     (x + 1) * size - border)
-                ]
-                if self.crossword.structure[x][y]:
-                    draw.rectangle(rect, fill="white")
-                    if letters[x][y]:
-                        w, h = draw.textsize(letters[x][y], font=font)
-                        draw.text(
-                            (rect[0][0] + ((interior - w) / 2),
-                             rect[0][1] + ((interior - h) / 2) - 10),
-                            letters[x][y], fill="black", font=font
-                        )
-
-        img.save(filename)
-
-    def solve(self):
+    def solve(self, backjumping=False, nogood_limit=10000):
         """
         Enforce node and arc consistency, and then solve the CSP.
+        If `backjumping` is True, search with conflict-directed backjumping
+        and a nogood store holding at most `nogood_limit` nogoods.
         """
         self.enforce_node_consistency()
-        self.ac3()
+        if not self.ac3():
+            return None
+        if backjumping:
+            assignment, _ = self.backjump(dict(), NogoodStore(nogood_limit))
+            return assignment
         return self.backtrack(dict())
 
+    def solutions(self):
+        """
+        Enforce node and arc consistency, and then lazily generate every
+        complete assignment of the CSP. Only the current search path is
+        kept in memory, so callers can stream through any number of fills.
+        """
+        self.enforce_node_consistency()
+        if not self.ac3():
+            return
+        yield from self.enumerate(dict())
+
+    def count_solutions(self):
+        """
+        Enforce node and arc consistency, and then return the number of
+        complete assignments of the CSP, without generating them.
+        """
+        self.enforce_node_consistency()
+        if not self.ac3():
+            return 0
+        return self.count(frozenset(self.crossword.variables), dict(), dict())
+
     def enforce_node_consistency(self):
         """
         Update `self.domains` such that each variable is node-consistent.
@@ -109,9 +155,11 @@ class CrosswordCreator():
          constraints; in this case, the length of the word.)
         """
         for var in self.domains:
-            for word in set(self.domains[var]):
-                if len(word) != var.length:
-                    self.domains[var].remove(word)
+            if any(len(word) != var.length for word in self.domains[var]):
+                self.domains[var] = set(
+                    word for word in self.domains[var]
+                    if len(word) == var.length
+                )
 
     def revise(self, x, y):
         """
@@ -121,21 +169,29 @@ class CrosswordCreator():
         Return True if a revision was made to the domain of `x`; return
         False if no revision was made.
         """
-        revised = False
         a, b = self.crossword.overlaps[x, y]
-
-        for word1 in set(self.domains[x]):
-            remove = True
-
-            for word2 in self.domains[y]:
-                if word1[a] == word2[b]:
-                    remove = False
-
-            if remove:
-                self.domains[x].remove(word1)
-                revised = True
-
-        return revised
+        words = self.crossword.words
+
+        # A domain still holding every word of its length has its letters
+        # read from the dictionary's index
+        if self.domains[y] is words.of_length(y.length):
+            letters = words.letters(y.length, b)
+        else:
+            letters = set(word[b] for word in self.domains[y])
+
+        # Domains may be shared length buckets, so replace rather than mutate
+        if self.domains[x] is words.of_length(x.length):
+            if letters >= words.letters(x.length, a):
+                return False
+            kept = set().union(*[
+                words.with_letter(x.length, a, letter) for letter in letters
+            ])
+        else:
+            kept = set(word for word in self.domains[x] if word[a] in letters)
+        if len(kept) == len(self.domains[x]):
+            return False
+        self.domains[x] = kept
+        return True
 
     def ac3(self, arcs=None):
         """
@@ -257,21 +313,289 @@ class CrosswordCreator():
 
         return None
 
+    def candidates(self, var, assignment):
+        """
+        Return the list of values in the domain of `var` that are consistent
+        with `assignment`: unused, and agreeing with every assigned neighbor.
+        """
+        used = set(assignment.values())
+        words = self.crossword.words
+
+        # Each assigned neighbor narrows the domain to the words with its
+        # letter at the overlap, which the dictionary indexes
+        matches = self.domains[var]
+        for neighbor in self.crossword.neighbors(var):
+            if neighbor in assignment:
+                a, b = self.crossword.overlaps[var, neighbor]
+                matches = matches & words.with_letter(
+                    var.length, a, assignment[neighbor][b]
+                )
+        return [word for word in matches if word not in used]
+
+    def enumerate(self, assignment):
+        """
+        Generate every complete assignment that extends `assignment`, as a
+        new dictionary each time. Branches on the unassigned variable with
+        the fewest consistent values.
+        """
+        unassigned = self.crossword.variables - set(assignment)
+        if not unassigned:
+            yield dict(assignment)
+            return
+
+        var, values = None, None
+        for v in unassigned:
+            candidates = self.candidates(v, assignment)
+            if values is None or len(candidates) < len(values):
+                var, values = v, candidates
+                if not values:
+                    return
+
+        for val in values:
+            assignment[var] = val
+            yield from self.enumerate(assignment)
+            assignment.pop(var)
+
+    def components(self, variables):
+        """
+        Split `variables` into groups that do not overlap one another.
+        Groups still depend on each other through the rule that every
+        word may only be used once, which `count_apart` accounts for.
+        """
+        parent = {var: var for var in variables}
+
+        def find(var):
+            while parent[var] != var:
+                parent[var] = parent[parent[var]]
+                var = parent[var]
+            return var
+
+        for var in variables:
+            for neighbor in self.crossword.neighbors(var):
+                if neighbor in parent:
+                    parent[find(var)] = find(neighbor)
+
+        groups = dict()
+        for var in variables:
+            groups.setdefault(find(var), set()).add(var)
+        return [frozenset(group) for group in groups.values()]
+
+    def count(self, variables, assignment, cache):
+        """
+        Return the number of ways to complete `assignment` over the
+        unassigned `variables`, from the counts of the groups of them
+        that do not overlap.
+        """
+        return self.count_apart(self.components(variables), assignment, cache)
+
+    def count_apart(self, components, assignment, cache):
+        """
+        Return the number of ways to complete `assignment` over a list of
+        `components` that do not overlap, using no word twice.
+
+        One component is counted apart from the rest. Neither side uses a
+        word twice, so a word used by both is one variable on each side,
+        of the same length, with the same word. By inclusion-exclusion
+        over the sets of such pairs (the matchings between same-length
+        variables of the two sides), the count is the sum over matchings
+        of -1 to the power of their size, times the ways for the matched
+        variables to agree (see `agree`). The empty matching is the
+        product of the two sides' counts. The component peeled off is the
+        one with the fewest variables whose length the rest shares, so
+        that there are as few matchings as possible.
+        """
+        if not components:
+            return 1
+        if len(components) == 1:
+            return self.count_component(components[0], assignment, cache)
+
+        lengths = dict()
+        for component in components:
+            for length in set(var.length for var in component):
+                lengths[length] = lengths.get(length, 0) + 1
+
+        def shared(component):
+            return [var for var in component if lengths[var.length] > 1]
+
+        first = min(components, key=lambda component: len(shared(component)))
+        rest = frozenset().union(*[
+            component for component in components if component is not first
+        ])
+        if not shared(first):
+            total = self.count_component(first, assignment, cache)
+            return total and total * self.count(rest, assignment, cache)
+
+        # Pairs of same-length variables that have a word in common
+        partners = dict()
+        for var in shared(first):
+            values = set(self.candidates(var, assignment))
+            partners[var] = [
+                other for other in rest
+                if other.length == var.length
+                and not values.isdisjoint(self.candidates(other, assignment))
+            ]
+
+        def matchings(left, taken):
+            if not left:
+                yield []
+                return
+            var, left = left[0], left[1:]
+            yield from matchings(left, taken)
+            for other in partners[var]:
+                if other not in taken:
+                    for pairs in matchings(left, taken | {other}):
+                        yield [(var, other)] + pairs
+
+        total = 0
+        for pairs in matchings(list(partners), frozenset()):
+            ways = self.agree(first, rest, pairs, assignment, cache)
+            total += -ways if len(pairs) % 2 else ways
+        return total
+
+    def agree(self, first, rest, pairs, assignment, cache):
+        """
+        Return the number of ways to complete `assignment` over `first` and
+        over `rest`, counted apart, in which both variables of each of
+        `pairs` have the same word.
+        """
+        if not pairs:
+            total = self.count(first, assignment, cache)
+            return total and total * self.count(rest, assignment, cache)
+
+        (var, other), pairs = pairs[0], pairs[1:]
+        values = set(self.candidates(var, assignment)).intersection(
+            self.candidates(other, assignment)
+        )
+        total = 0
+        for val in values:
+            assignment[var] = assignment[other] = val
+            total += self.agree(
+                first - {var}, rest - {other}, pairs, assignment, cache
+            )
+            del assignment[var], assignment[other]
+        return total
+
+    def count_component(self, component, assignment, cache):
+        """
+        Return the number of ways to complete `assignment` over a connected
+        `component` of unassigned variables. Counts are cached by the
+        component and everything outside it that it can see: the letters
+        forced by assigned neighbors and the words already used at its
+        lengths.
+        """
+        lengths = set(var.length for var in component)
+        boundary = []
+        for var in component:
+            for neighbor in self.crossword.neighbors(var):
+                if neighbor in assignment:
+                    a, b = self.crossword.overlaps[var, neighbor]
+                    boundary.append((var, a, assignment[neighbor][b]))
+        key = (
+            component,
+            frozenset(boundary),
+            frozenset(w for w in assignment.values() if len(w) in lengths)
+        )
+        if key in cache:
+            return cache[key]
+
+        var, values = None, None
+        for v in component:
+            candidates = self.candidates(v, assignment)
+            if values is None or len(candidates) < len(values):
+                var, values = v, candidates
+
+        total = 0
+        for val in values:
+            assignment[var] = val
+            total += self.count(component - {var}, assignment, cache)
+            assignment.pop(var)
+
+        cache[key] = total
+        return total
+
+    def conflicts(self, assignment, var, value, nogoods):
+        """
+        Return the set of assigned variables that rule out assigning `value`
+        to `var`, either by sharing the word, by disagreeing on an
+        overlapping letter, or by completing a known nogood.
+        An empty set means `value` is consistent with `assignment`.
+        """
+        culprits = set()
+        for other, word in assignment.items():
+            if word == value:
+                culprits.add(other)
+                continue
+            overlap = self.crossword.overlaps[var, other]
+            if overlap and value[overlap[0]] != word[overlap[1]]:
+                culprits.add(other)
+        if culprits:
+            return culprits
+
+        nogood = nogoods.violated(assignment, var, value)
+        if nogood is not None:
+            return set(v for v, _ in nogood if v != var)
+        return culprits
+
+    def backjump(self, assignment, nogoods):
+        """
+        Using backtracking search with conflict-directed backjumping, take as
+        input a partial assignment for the crossword and return a tuple
+        (assignment, conflict set).
+        On success the assignment is complete and the conflict set is empty.
+        On failure the assignment is None and the conflict set holds the
+        assigned variables responsible; search unwinds past any variable not
+        in it. Each failure is recorded in `nogoods` so that the same partial
+        assignment is never explored twice.
+        """
+        if self.assignment_complete(assignment):
+            return assignment, set()
+
+        var = self.select_unassigned_variable(assignment)
+        conflict = set()
+
+        for val in self.domains[var]:
+            culprits = self.conflicts(assignment, var, val, nogoods)
+            if culprits:
+                conflict |= culprits
+                continue
+
+            assignment[var] = val
+            res, child_conflict = self.backjump(assignment, nogoods)
+            if res is not None:
+                return res, set()
+            assignment.pop(var)
+
+            # The failure below does not depend on `var`, so jump over it
+            if var not in child_conflict:
+                return None, child_conflict
+            conflict |= child_conflict - {var}
+
+        nogoods.add((v, assignment[v]) for v in conflict)
+        return None, conflict
+
 
 def main():
+    # Options are separated from the positional arguments
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    backjumping = "--backjump" in sys.argv[1:]
+    counting = "--count" in sys.argv[1:]
+
     # Checks if the command has been entered correctly.
-    if len(sys.argv) not in [3, 4]:
-        sys.exit("Incorrect command!!! Must enter in following format -> python generate.py structure words [output]")
+    if len(args) not in [2, 3]:
+        sys.exit("Incorrect command!!! Must enter in following format -> python generate.py structure words [output] [--backjump] [--count]")
 
-    structure = sys.argv[1]
-    words = sys.argv[2]
-    output = sys.argv[3] \
-        if len(sys.argv) == 4 else None
+    structure = args[0]
+    words = args[1]
+    output = args[2] \
+        if len(args) == 3 else None
 
     # Crossword is generated
     crossword = Crossword(structure, words)
     creator = CrosswordCreator(crossword)
-    assignment = creator.solve()
+    if counting:
+        print(f"Solutions: {creator.count_solutions()}")
+        return
+    assignment = creator.solve(backjumping=backjumping)
 
     # Result gets printed
     if assignment is None:
@@ -0,0 +1,147 @@
+import os
+from xml.sax.saxutils import escape
+
+from PIL import Image, ImageDraw, ImageFont
+
+
+FONT = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "assets", "fonts", "OpenSans-Regular.ttf"
+)
+
+
+class Renderer():
+    """
+    Renders filled crossword grids as images, SVG or plain text.
+
+    Every distinct cell (blank, or holding a given letter) is rasterized
+    once per font and cell size into a tile, and the tiles are cached at
+    class level so that they are shared by every renderer in the process.
+    Drawing a grid then only pastes one tile per open cell.
+    """
+
+    fonts = dict()
+    tiles = dict()
+
+    def __init__(self, cell_size=100, font=FONT):
+        self.cell_size = cell_size
+        self.font = font
+        self.border = max(1, cell_size // 50)
+
+    def load_font(self):
+        """Return the TrueType font scaled to the cell size, loading it once."""
+        key = (self.font, self.cell_size)
+        if key not in Renderer.fonts:
+            Renderer.fonts[key] = ImageFont.truetype(
+                self.font, self.cell_size * 4 // 5
+            )
+        return Renderer.fonts[key]
+
+    def tile(self, letter):
+        """
+        Return the image of an open cell holding `letter` (or nothing, if
+        `letter` is None), rasterizing it on first use.
+        """
+        key = (self.font, self.cell_size, letter)
+        if key in Renderer.tiles:
+            return Renderer.tiles[key]
+
+        size = self.cell_size
+        border = self.border
+        tile = Image.new("L", (size, size), "black")
+        draw = ImageDraw.Draw(tile)
+        draw.rectangle(
+            [(border, border), (size - border, size - border)], fill="white"
+        )
+
+        # Center the glyph's ink within the cell interior
+        if letter:
+            font = self.load_font()
+            left, top, right, bottom = draw.textbbox((0, 0), letter, font=font)
+            draw.text(
+                ((size - (right - left)) / 2 - left,
+                 (size - (bottom - top)) / 2 - top),
+                letter, fill="black", font=font
+            )
+
+        Renderer.tiles[key] = tile
+        return tile
+
+    def image(self, structure, letters):
+        """
+        Return an image of a grid, given its structure (True for open cells)
+        and a letter grid as built by `CrosswordCreator.letter_grid`.
+        """
+        size = self.cell_size
+        height = len(structure)
+        width = len(structure[0]) if structure else 0
+        img = Image.new("L", (width * size, height * size), "black")
+
+        for x in range(height):
+            for y in range(width):
+                if structure[x][y]:
+                    img.paste(self.tile(letters[x][y]), (y * size, x * size))
+
+        return img
+
+    def svg(self, structure, letters):
+        """Return an SVG document of a grid, as a string."""
+        size = self.cell_size
+        border = self.border
+        height = len(structure)
+        width = len(structure[0]) if structure else 0
+
+        lines = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" '
+            f'width="{width * size}" height="{height * size}">',
+            '<rect width="100%" height="100%" fill="black"/>',
+            f'<g font-family="Open Sans, sans-serif" '
+            f'font-size="{size * 4 // 5}" text-anchor="middle" '
+            f'dominant-baseline="central">'
+        ]
+        for x in range(height):
+            for y in range(width):
+                if not structure[x][y]:
+                    continue
+                lines.append(
+                    f'<rect x="{y * size + border}" y="{x * size + border}" '
+                    f'width="{size - 2 * border}" '
+                    f'height="{size - 2 * border}" fill="white"/>'
+                )
+                if letters[x][y]:
+                    lines.append(
+                        f'<text x="{y * size + size // 2}" '
+                        f'y="{x * size + size // 2}">'
+                        f'{escape(letters[x][y])}</text>'
+                    )
+        lines.append("</g>")
+        lines.append("</svg>")
+        return "\n".join(lines) + "\n"
+
+    def text(self, structure, letters):
+        """
+        Return a grid as text, in the format of the structure files:
+        "#" for blocked cells, "_" for empty open cells, and letters.
+        """
+        return "".join(
+            "".join(
+                (letters[x][y] or "_") if structure[x][y] else "#"
+                for y in range(len(structure[x]))
+            ) + "\n"
+            for x in range(len(structure))
+        )
+
+    def save(self, structure, letters, filename):
+        """
+        Save a grid to `filename`, as SVG or text for the .svg and .txt
+        extensions, and as an image otherwise.
+        """
+        extension = os.path.splitext(filename)[1].lower()
+        if extension == ".svg":
+            with open(filename, "w") as f:
+                f.write(self.svg(structure, letters))
+        elif extension == ".txt":
+            with open(filename, "w") as f:
+                f.write(self.text(structure, letters))
+        else:
+            self.image(structure, letters).save(filename)
@@ -0,0 +1,151 @@
+from array import array
+
+
+class CNF():
+    """
+    Clause set built by Tseitin encoding: every compound subformula gets a
+    fresh variable that is constrained to be equivalent to it, so the
+    clauses are equisatisfiable with the formula and linear in its size.
+
+    Gates are shared structurally: a gate is keyed by its normalized input
+    literals, so identical subformulas, wherever they occur, are defined
+    once. Disjunctions are encoded as negated conjunctions, and
+    biconditionals are normalized by the signs of their inputs, so that
+    e.g. ¬(a ∧ b) and ¬a ∨ ¬b share one gate.
+
+    Variables are numbered from 1 and a negative literal is a negated
+    variable. Symbols are mapped to variables by name. Clauses are stored
+    in one flat integer array, each clause terminated by 0 as in DIMACS.
+    """
+
+    def __init__(self):
+        self.num_vars = 0
+        self.num_clauses = 0
+        self.literals = array("i")
+        self.variables = dict()
+        self.gates = dict()
+        self.true = None
+
+    def __iter__(self):
+        """Iterate over the clauses, as lists of literals."""
+        return self.clauses_from(0)
+
+    def clauses_from(self, start):
+        """
+        Iterate over the clauses that begin at or after index `start` of
+        the literal array, such as those added since its length was `start`.
+        """
+        clause = []
+        for i in range(start, len(self.literals)):
+            lit = self.literals[i]
+            if lit:
+                clause.append(lit)
+            else:
+                yield clause
+                clause = []
+
+    def __len__(self):
+        return self.num_clauses
+
+    @property
+    def clauses(self):
+        """Return the clauses as a list of lists of literals."""
+        return list(self)
+
+    def new_var(self):
+        """Add a fresh variable and return its number."""
+        self.num_vars += 1
+        return self.num_vars
+
+    def symbol(self, name):
+        """Return the variable of a symbol, creating it on first use."""
+        if name not in self.variables:
+            self.variables[name] = self.new_var()
+        return self.variables[name]
+
+    def constant(self, value):
+        """Return a literal that is always `value`."""
+        if self.true is None:
+            self.true = self.new_var()
+            self.add_clause([self.true])
+        return self.true if value else -self.true
+
+    def add_clause(self, lits):
+        """Add a clause, given as an iterable of literals."""
+        self.literals.extend(lits)
+        self.literals.append(0)
+        self.num_clauses += 1
+
+    def encode(self, sentence):
+        """Return a literal equivalent to `sentence`, adding its clauses."""
+        return sentence.encode(self)
+
+    def require(self, sentence):
+        """
+        Add clauses that hold exactly when `sentence` is true.
+        Top-level conjunctions and disjunctions become clauses directly
+        instead of gates.
+        """
+        sentence.require(self)
+
+    def refute(self, sentence):
+        """Add clauses that hold exactly when `sentence` is false."""
+        sentence.refute(self)
+
+    def conjunction(self, lits):
+        """Return a literal equivalent to the conjunction of `lits`."""
+        inputs = set(lits)
+        if self.true is not None:
+            if -self.true in inputs:
+                return self.constant(False)
+            inputs.discard(self.true)
+        if any(-lit in inputs for lit in inputs):
+            return self.constant(False)
+        if not inputs:
+            return self.constant(True)
+        if len(inputs) == 1:
+            return inputs.pop()
+
+        key = ("and", frozenset(inputs))
+        if key not in self.gates:
+            gate = self.new_var()
+            for lit in inputs:
+                self.add_clause([-gate, lit])
+            self.add_clause([gate] + [-lit for lit in inputs])
+            self.gates[key] = gate
+        return self.gates[key]
+
+    def disjunction(self, lits):
+        """Return a literal equivalent to the disjunction of `lits`."""
+        return -self.conjunction([-lit for lit in lits])
+
+    def equivalence(self, left, right):
+        """Return a literal equivalent to `left` <=> `right`."""
+        if left == right:
+            return self.constant(True)
+        if left == -right:
+            return self.constant(False)
+
+        # a <=> b, ¬a <=> ¬b and the negation of ¬a <=> b share one gate
+        sign = 1
+        if left < 0:
+            left, sign = -left, -sign
+        if right < 0:
+            right, sign = -right, -sign
+        key = ("iff", min(left, right), max(left, right))
+        if key not in self.gates:
+            gate = self.new_var()
+            self.add_clause([-gate, -left, right])
+            self.add_clause([-gate, left, -right])
+            self.add_clause([gate, left, right])
+            self.add_clause([gate, -left, -right])
+            self.gates[key] = gate
+        return sign * self.gates[key]
+
+    def dimacs(self):
+        """Return the clauses in DIMACS CNF format."""
+        lines = [f"p cnf {self.num_vars} {self.num_clauses}"]
+        lines.extend(
+            " ".join(str(lit) for lit in clause) + " 0" for clause in self
+        )
+        return "\n".join(lines) + "\n"
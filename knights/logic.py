@@ -1,19 +1,129 @@
+import collections
 import itertools
-
-
-class Sentence():
+import multiprocessing
+import weakref
+
+from cnf import CNF
+from resolution import Prover
+from sat import Solver
+
+
+class Interned(type):
+    """
+    Metaclass that hash-conses sentences: constructing a sentence that is
+    structurally identical to one still alive returns that same object,
+    so identical subformulas are shared.
+    Classes whose instances can be modified (`interned = False`) always
+    construct new objects. A sentence built from one of those holds an
+    immutable copy of it instead (see `Sentence.frozen`), so that the
+    hashes and symbols cached on sentences never go stale.
+    """
+
+    table = weakref.WeakValueDictionary()
+
+    # Classes whose instances can be modified
+    mutable = set()
+
+    def __init__(cls, name, bases, namespace):
+        super().__init__(name, bases, namespace)
+        if not cls.interned:
+            Interned.mutable.add(cls)
+
+    def __call__(cls, *args, **kwargs):
+        if not Interned.mutable.isdisjoint(map(type, args)):
+            args = tuple(
+                arg.frozen() if isinstance(arg, Sentence) else arg
+                for arg in args
+            )
+        if kwargs or not cls.interned:
+            return super().__call__(*args, **kwargs)
+        return cls.intern(*args)
+
+    def intern(cls, *args):
+        """
+        Returns the live sentence built from `args`, building it if there
+        is none, for callers that already hold immutable operands.
+        """
+        key = (cls, *args)
+        sentence = Interned.table.get(key)
+        if sentence is None:
+            sentence = super().__call__(*args)
+            Interned.table[key] = sentence
+        return sentence
+
+
+class Sentence(metaclass=Interned):
+
+    interned = True
+
+    # Cached when the sentence is created, since sentences are immutable
+    _hash = None
+    _symbols = frozenset()
+    _size = 1
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def evaluate_all(self, columns, mask):
+        """
+        Evaluates the logical sentence in many models at once.
+        `columns` maps each symbol to an integer whose bit m is the
+        symbol's value in model m, and `mask` has a bit set for every model.
+        Returns the integer of the sentence's values in the same models.
+        """
+        raise Exception("nothing to evaluate")
+
+    def evaluate_partial(self, bits, assigned, values):
+        """
+        Evaluates the logical sentence in a partial model, in three-valued
+        logic. `bits` maps each symbol to a bit, `assigned` has the bits of
+        the symbols with a value, and `values` has the bits of the symbols
+        that are true. Returns True or False if every completion of the
+        model agrees, and None otherwise.
+        """
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
 
+    def frozen(self):
+        """Returns an immutable sentence equal to this one."""
+        return self
+
     def symbols(self):
-        """Returns a set of all symbols in the logical sentence."""
-        return set()
+        """Returns a frozen set of all symbols in the logical sentence."""
+        return self._symbols
+
+    def simplify(self, model=None):
+        """
+        Returns an equivalent, simplified logical sentence: nested
+        conjunctions and disjunctions are flattened, duplicates removed,
+        constants folded (including symbols given a value by the partial
+        `model`, if any), negations pushed inwards and implications
+        rewritten as disjunctions, wherever that makes the sentence smaller.
+        """
+        raise Exception("nothing to simplify")
+
+    def size(self):
+        """Returns the number of nodes in the logical sentence."""
+        return self._size
+
+    def encode(self, cnf):
+        """
+        Adds clauses defining the logical sentence to `cnf` and returns
+        a literal equivalent to it.
+        """
+        raise Exception("nothing to encode")
+
+    def require(self, cnf):
+        """Adds clauses to `cnf` that hold exactly when the sentence is true."""
+        cnf.add_clause([cnf.encode(self)])
+
+    def refute(self, cnf):
+        """Adds clauses to `cnf` that hold exactly when the sentence is false."""
+        cnf.add_clause([-cnf.encode(self)])
 
     @classmethod
     def validate(cls, sentence):
@@ -46,12 +156,19 @@ class Symbol(Sentence):
 
     def __init__(self, name):
         self.name = name
+        self._hash = hash(("symbol", name))
+        self._symbols = frozenset([name])
 
     def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+        return self is other or (
+            isinstance(other, Symbol) and self.name == other.name
+        )
 
     def __hash__(self):
-        return hash(("symbol", self.name))
+        return self._hash
+
+    def __reduce__(self):
+        return (Symbol, (self.name,))
 
     def __repr__(self):
         return self.name
@@ -62,23 +179,103 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def evaluate_all(self, columns, mask):
+        try:
+            return columns[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
+    def evaluate_partial(self, bits, assigned, values):
+        try:
+            bit = bits[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+        if assigned & bit:
+            return bool(values & bit)
+        return None
+
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+    def simplify(self, model=None):
+        if model and self.name in model:
+            return Constant(bool(model[self.name]))
+        return self
+
+    def encode(self, cnf):
+        return cnf.symbol(self.name)
+
+
+class Constant(Sentence):
+
+    def __init__(self, value):
+        self.value = bool(value)
+        self._hash = hash(("constant", self.value))
+
+    def __eq__(self, other):
+        return self is other or (
+            isinstance(other, Constant) and self.value == other.value
+        )
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return (Constant, (self.value,))
+
+    def __repr__(self):
+        return "TRUE" if self.value else "FALSE"
+
+    def evaluate(self, model):
+        return self.value
+
+    def evaluate_all(self, columns, mask):
+        return mask if self.value else 0
+
+    def evaluate_partial(self, bits, assigned, values):
+        return self.value
+
+    def formula(self):
+        return "⊤" if self.value else "⊥"
+
+    def simplify(self, model=None):
+        return self
+
+    def encode(self, cnf):
+        return cnf.constant(self.value)
+
+    def require(self, cnf):
+        if not self.value:
+            cnf.add_clause([])
+
+    def refute(self, cnf):
+        if self.value:
+            cnf.add_clause([])
+
+
+TRUE = Constant(True)
+FALSE = Constant(False)
 
 
 class Not(Sentence):
     def __init__(self, operand):
         Sentence.validate(operand)
         self.operand = operand
+        self._hash = hash(("not", operand._hash))
+        self._symbols = operand._symbols
+        self._size = 1 + operand._size
 
     def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+        return self is other or (
+            isinstance(other, Not) and self._hash == other._hash
+            and self.operand == other.operand
+        )
 
     def __hash__(self):
-        return hash(("not", hash(self.operand)))
+        return self._hash
+
+    def __reduce__(self):
+        return (Not, (self.operand,))
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -86,26 +283,65 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def evaluate_all(self, columns, mask):
+        return mask ^ self.operand.evaluate_all(columns, mask)
+
+    def evaluate_partial(self, bits, assigned, values):
+        value = self.operand.evaluate_partial(bits, assigned, values)
+        return None if value is None else not value
+
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+    def simplify(self, model=None):
+        return negate(self.operand.simplify(model))
+
+    def encode(self, cnf):
+        return -cnf.encode(self.operand)
+
+    def require(self, cnf):
+        cnf.refute(self.operand)
+
+    def refute(self, cnf):
+        cnf.require(self.operand)
 
 
 class And(Sentence):
+
+    # Conjunctions can be extended with `add`, so they are never shared
+    interned = False
+
     def __init__(self, *conjuncts):
         for conjunct in conjuncts:
-            Sentence.validate(conjunct)
+            if not isinstance(conjunct, Sentence):
+                raise TypeError("must be a logical sentence")
         self.conjuncts = list(conjuncts)
 
+        # Read from the operands' caches, which are set, since sentences
+        # are only built from immutable ones
+        self._hash = hash(
+            ("and", tuple([conjunct._hash for conjunct in conjuncts]))
+        )
+        self._symbols = frozenset().union(
+            *[conjunct._symbols for conjunct in conjuncts]
+        )
+        self._size = 1 + sum([conjunct._size for conjunct in conjuncts])
+
     def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        return self is other or (
+            isinstance(other, And) and hash(self) == hash(other)
+            and self.conjuncts == other.conjuncts
+        )
 
     def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+        if self._hash is None:
+            self._hash = hash(
+                ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
+            )
+        return self._hash
+
+    def __reduce__(self):
+        return (And, tuple(self.conjuncts))
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -115,11 +351,34 @@ class And(Sentence):
 
     def add(self, conjunct):
         Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        self.conjuncts.append(conjunct.frozen())
+
+        # Caches are rebuilt on the next use
+        self._hash = None
+        self._symbols = None
+        self._size = None
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def evaluate_all(self, columns, mask):
+        result = mask
+        for conjunct in self.conjuncts:
+            result &= conjunct.evaluate_all(columns, mask)
+            if not result:
+                break
+        return result
+
+    def evaluate_partial(self, bits, assigned, values):
+        result = True
+        for conjunct in self.conjuncts:
+            value = conjunct.evaluate_partial(bits, assigned, values)
+            if value is False:
+                return False
+            if value is None:
+                result = None
+        return result
+
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
@@ -127,22 +386,84 @@ class And(Sentence):
                            for conjunct in self.conjuncts])
 
     def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+        if self._symbols is None:
+            self._symbols = frozenset().union(
+                *[conjunct.symbols() for conjunct in self.conjuncts]
+            )
+        return self._symbols
+
+    def simplify(self, model=None):
+        return combine(
+            And, [conjunct.simplify(model) for conjunct in self.conjuncts]
+        )
+
+    def size(self):
+        if self._size is None:
+            self._size = 1 + sum(
+                conjunct.size() for conjunct in self.conjuncts
+            )
+        return self._size
+
+    def encode(self, cnf):
+        return cnf.conjunction(
+            [cnf.encode(conjunct) for conjunct in self.conjuncts]
+        )
+
+    def require(self, cnf):
+        for conjunct in self.conjuncts:
+            cnf.require(conjunct)
+
+    def refute(self, cnf):
+        cnf.add_clause([-cnf.encode(conjunct) for conjunct in self.conjuncts])
+
+    def frozen(self):
+        return FrozenAnd(*self.conjuncts)
+
+
+class FrozenAnd(And):
+    """
+    Conjunction that cannot be extended, which sentences built from an
+    `And` hold in its place. It is equal to an `And` of the same
+    conjuncts, and shared like other sentences.
+    """
+
+    interned = True
+
+    def __reduce__(self):
+        return (FrozenAnd, tuple(self.conjuncts))
+
+    def add(self, conjunct):
+        raise TypeError("a conjunction inside another sentence cannot be extended")
+
+    def frozen(self):
+        return self
 
 
 class Or(Sentence):
     def __init__(self, *disjuncts):
         for disjunct in disjuncts:
-            Sentence.validate(disjunct)
+            if not isinstance(disjunct, Sentence):
+                raise TypeError("must be a logical sentence")
         self.disjuncts = list(disjuncts)
+        self._hash = hash(
+            ("or", tuple([disjunct._hash for disjunct in disjuncts]))
+        )
+        self._symbols = frozenset().union(
+            *[disjunct._symbols for disjunct in disjuncts]
+        )
+        self._size = 1 + sum([disjunct._size for disjunct in disjuncts])
 
     def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return self is other or (
+            isinstance(other, Or) and self._hash == other._hash
+            and self.disjuncts == other.disjuncts
+        )
 
     def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+        return self._hash
+
+    def __reduce__(self):
+        return (Or, tuple(self.disjuncts))
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -151,14 +472,46 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def evaluate_all(self, columns, mask):
+        result = 0
+        for disjunct in self.disjuncts:
+            result |= disjunct.evaluate_all(columns, mask)
+            if result == mask:
+                break
+        return result
+
+    def evaluate_partial(self, bits, assigned, values):
+        result = False
+        for disjunct in self.disjuncts:
+            value = disjunct.evaluate_partial(bits, assigned, values)
+            if value is True:
+                return True
+            if value is None:
+                result = None
+        return result
+
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def simplify(self, model=None):
+        return combine(
+            Or, [disjunct.simplify(model) for disjunct in self.disjuncts]
+        )
+
+    def encode(self, cnf):
+        return cnf.disjunction(
+            [cnf.encode(disjunct) for disjunct in self.disjuncts]
+        )
+
+    def require(self, cnf):
+        cnf.add_clause([cnf.encode(disjunct) for disjunct in self.disjuncts])
+
+    def refute(self, cnf):
+        for disjunct in self.disjuncts:
+            cnf.refute(disjunct)
 
 
 class Implication(Sentence):
@@ -167,14 +520,22 @@ class Implication(Sentence):
         Sentence.validate(consequent)
         self.antecedent = antecedent
         self.consequent = consequent
+        self._hash = hash(("implies", antecedent._hash, consequent._hash))
+        self._symbols = antecedent._symbols | consequent._symbols
+        self._size = 1 + antecedent._size + consequent._size
 
     def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+        return self is other or (
+            isinstance(other, Implication) and self._hash == other._hash
+            and self.antecedent == other.antecedent
+            and self.consequent == other.consequent
+        )
 
     def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        return self._hash
+
+    def __reduce__(self):
+        return (Implication, (self.antecedent, self.consequent))
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -183,13 +544,47 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def evaluate_all(self, columns, mask):
+        return ((mask ^ self.antecedent.evaluate_all(columns, mask))
+                | self.consequent.evaluate_all(columns, mask))
+
+    def evaluate_partial(self, bits, assigned, values):
+        antecedent = self.antecedent.evaluate_partial(bits, assigned, values)
+        if antecedent is False:
+            return True
+        consequent = self.consequent.evaluate_partial(bits, assigned, values)
+        if consequent is True:
+            return True
+        if antecedent is True and consequent is False:
+            return False
+        return None
+
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def simplify(self, model=None):
+        antecedent = self.antecedent.simplify(model)
+        consequent = self.consequent.simplify(model)
+        candidate = combine(Or, [negation(antecedent), consequent])
+        if candidate.size() <= 1 + antecedent.size() + consequent.size():
+            return candidate
+        return Implication(antecedent, consequent)
+
+    def encode(self, cnf):
+        return cnf.disjunction(
+            [-cnf.encode(self.antecedent), cnf.encode(self.consequent)]
+        )
+
+    def require(self, cnf):
+        cnf.add_clause(
+            [-cnf.encode(self.antecedent), cnf.encode(self.consequent)]
+        )
+
+    def refute(self, cnf):
+        cnf.require(self.antecedent)
+        cnf.refute(self.consequent)
 
 
 class Biconditional(Sentence):
@@ -198,66 +593,564 @@ class Biconditional(Sentence):
         Sentence.validate(right)
         self.left = left
         self.right = right
+        self._hash = hash(("biconditional", left._hash, right._hash))
+        self._symbols = left._symbols | right._symbols
+        self._size = 1 + left._size + right._size
 
     def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return self is other or (
+            isinstance(other, Biconditional) and self._hash == other._hash
+            and self.left == other.left
+            and self.right == other.right
+        )
 
     def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        return self._hash
+
+    def __reduce__(self):
+        return (Biconditional, (self.left, self.right))
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
 
     def evaluate(self, model):
-        return ((self.left.evaluate(model)
-                 and self.right.evaluate(model))
-                or (not self.left.evaluate(model)
-                    and not self.right.evaluate(model)))
+        return self.left.evaluate(model) == self.right.evaluate(model)
+
+    def evaluate_all(self, columns, mask):
+        return mask ^ (self.left.evaluate_all(columns, mask)
+                       ^ self.right.evaluate_all(columns, mask))
+
+    def evaluate_partial(self, bits, assigned, values):
+        left = self.left.evaluate_partial(bits, assigned, values)
+        if left is None:
+            return None
+        right = self.right.evaluate_partial(bits, assigned, values)
+        if right is None:
+            return None
+        return left == right
 
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
+        left = Sentence.parenthesize(self.left.formula())
+        right = Sentence.parenthesize(self.right.formula())
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+    def simplify(self, model=None):
+        left = self.left.simplify(model)
+        right = self.right.simplify(model)
+        if isinstance(left, Constant):
+            left, right = right, left
+        if isinstance(right, Constant):
+            return left if right.value else negate(left)
+        if left == right:
+            return TRUE
+        if left == negation(right) or negation(left) == right:
+            return FALSE
+        return Biconditional(left, right)
+
+    def encode(self, cnf):
+        return cnf.equivalence(cnf.encode(self.left), cnf.encode(self.right))
+
+
+def negatable(sentence):
+    """Returns the operands of a conjunction or disjunction."""
+    return sentence.conjuncts if isinstance(sentence, And) else sentence.disjuncts
+
+
+def negation(sentence):
+    """
+    Returns the negation of a simplified sentence, only folding constants
+    and double negations.
+    """
+    if isinstance(sentence, Constant):
+        return Constant(not sentence.value)
+    if isinstance(sentence, Not):
+        return sentence.operand
+    return Not(sentence)
+
+
+def negate(sentence):
+    """
+    Returns the simplified negation of a simplified sentence: its
+    `negation`, or, by De Morgan's laws, the dual connective over the
+    `negation`s of its operands, if that is smaller. Nothing is
+    simplified again, so simplifying stays linear in the sentence size.
+    """
+    if isinstance(sentence, (And, Or)):
+        dual = Or if isinstance(sentence, And) else And
+        candidate = combine(
+            dual, [negation(part) for part in negatable(sentence)]
+        )
+        if candidate.size() <= sentence.size():
+            return candidate
+    return negation(sentence)
+
+
+def combine(connective, operands):
+    """
+    Returns the simplified conjunction or disjunction (`connective`) of
+    simplified `operands`: operands of the same connective, or negations
+    of the dual one, are flattened into it, and constants are folded,
+    before the distinct operands are joined.
+    """
+    absorbing = FALSE if connective is And else TRUE
+    dual = Or if connective is And else And
+    parts = dict()
+    for operand in operands:
+        if isinstance(operand, connective):
+            flattened = negatable(operand)
+        elif isinstance(operand, Not) and isinstance(operand.operand, dual):
+            flattened = [negation(part) for part in negatable(operand.operand)]
+        else:
+            flattened = [operand]
+        for part in flattened:
+            if part == absorbing:
+                return absorbing
+            if part != Constant(not absorbing.value):
+                parts[part] = None
+    return join(connective, parts, absorbing)
+
+
+def join(connective, operands, absorbing):
+    """
+    Returns the conjunction or disjunction (`connective`) of the distinct,
+    simplified `operands`: the constant `absorbing` if any operand appears
+    both plain and negated, the other constant if there are no operands,
+    or the single operand if there is just one. Operands absorbed by
+    others, such as a ∧ b in a ∨ (a ∧ b), are dropped.
+    """
+    for operand in operands:
+        if isinstance(operand, Not) and operand.operand in operands:
+            return absorbing
+
+    dual = Or if connective is And else And
+    operands = [
+        operand for operand in operands
+        if not (isinstance(operand, dual)
+                and any(part in operands for part in negatable(operand)))
+    ]
+    if not operands:
+        return Constant(not absorbing.value)
+    if len(operands) == 1:
+        return next(iter(operands))
+    return connective(*operands)
+
+
+def simplify(sentence, model=None):
+    """
+    Simplifies a sentence, as `Sentence.simplify`, and reports how much it
+    shrank. Returns the simplified sentence and the number of nodes before
+    and after.
+    """
+    simplified = sentence.simplify(model)
+    return simplified, sentence.size(), simplified.size()
+
+
+class KnowledgeBase():
+    """
+    Knowledge base that keeps one incremental SAT solver for its lifetime.
+
+    Sentences are added as clauses, and queries are decided by solving
+    under temporary assumptions rather than by adding clauses, so clauses
+    learned while answering one query keep speeding up later queries and
+    additions.
+    """
+
+    def __init__(self, *sentences):
+        self.sentences = []
+        self.cnf = CNF()
+        self.solver = Solver()
+        self.loaded = 0
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """Adds a sentence to the knowledge base."""
+        Sentence.validate(sentence)
+        self.sentences.append(sentence)
+        self.cnf.require(sentence)
+
+    def literal(self, sentence):
+        """
+        Returns a solver literal equivalent to `sentence`, loading any
+        clauses that define it.
+        """
+        lit = self.cnf.encode(sentence)
+        self.load()
+        return lit
+
+    def load(self):
+        """Loads clauses encoded since the last call into the solver."""
+        for clause in self.cnf.clauses_from(self.loaded):
+            self.solver.add_clause(clause)
+        self.loaded = len(self.cnf.literals)
+
+    def satisfiable(self, *assumptions):
+        """
+        Checks if the knowledge base is satisfiable with every sentence in
+        `assumptions` true. If it is, `self.solver.model` holds a model.
+        """
+        lits = [self.literal(assumption) for assumption in assumptions]
+        self.load()
+        return self.solver.solve(lits)
+
+    def entails(self, query):
+        """Checks if the knowledge base entails `query`."""
+        lit = self.literal(query)
+        return not self.solver.solve([-lit])
+
+    def entails_all(self, queries):
+        """
+        Checks which of many queries the knowledge base entails.
+        Returns a list with a bool for each query. Every model found
+        refutes all the queries that are false in it.
+        """
+        literals = [self.literal(query) for query in queries]
+        entailed = [True] * len(queries)
+        if not self.solver.solve():
+            return entailed
+
+        def holds(lit, model):
+            return model.get(abs(lit), False) == (lit > 0)
+
+        pending = list(range(len(queries)))
+        model = self.solver.model
+        while pending:
+            if model is not None:
+                for i in pending:
+                    if not holds(literals[i], model):
+                        entailed[i] = False
+                pending = [i for i in pending if entailed[i]]
+                if not pending:
+                    break
+
+            # Look for a model of the knowledge base where the query is false
+            i = pending.pop()
+            model = None
+            if self.solver.solve([-literals[i]]):
+                model = self.solver.model
+                entailed[i] = False
+        return entailed
 
 
 def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
-
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
+    """
+    Checks if knowledge base entails query, by deciding with a SAT solver
+    whether knowledge ∧ ¬query is unsatisfiable.
+    """
+    cnf = CNF()
+    cnf.require(knowledge)
+    cnf.refute(query)
+
+    solver = Solver()
+    for clause in cnf:
+        if not solver.add_clause(clause):
+            return True
+    return not solver.solve()
+
+
+def resolution_prover(knowledge, query):
+    """
+    Returns a resolution `Prover` for whether knowledge base entails query,
+    and the CNF it was built from. The clauses of the knowledge base are
+    the background clauses, and the negation of the query's literal is
+    the set of support.
+    """
+    cnf = CNF()
+    cnf.require(knowledge)
+    lit = cnf.encode(query)
+    return Prover(cnf, [[-lit]]), cnf
+
+
+def model_check_resolution(knowledge, query, limit=None):
+    """
+    Checks if knowledge base entails query, by resolution refutation of
+    knowledge ∧ ¬query with the set-of-support strategy, so that the work
+    depends on the structure of the formulas rather than the number of
+    symbols. If `limit` clauses are derived without a decision, falls back
+    to `model_check`.
+    """
+    prover, cnf = resolution_prover(knowledge, query)
+    result = prover.prove(limit)
+    if result is None:
+        return model_check(knowledge, query)
+    if result:
+        return True
+
+    # The set of support is only complete if the knowledge base is
+    # satisfiable, and an unsatisfiable one entails everything
+    solver = Solver()
+    for clause in cnf:
+        if not solver.add_clause(clause):
+            return True
+    return not solver.solve()
+
+
+def prove(knowledge, query, limit=None):
+    """
+    Returns a resolution proof that knowledge base entails query, as a
+    list of lines, one per clause, or None if none is found (within
+    `limit` derived clauses). Literals of symbols are written by name,
+    and those of subformulas by their CNF variable.
+    """
+    prover, cnf = resolution_prover(knowledge, query)
+    if not prover.prove(limit):
+        return None
+
+    names = {var: name for name, var in cnf.variables.items()}
+
+    def literal(lit):
+        name = names.get(abs(lit), f"#{abs(lit)}")
+        return name if lit > 0 else f"¬{name}"
+
+    lines = []
+    steps = dict()
+    for step, (number, clause, origin) in enumerate(prover.proof(), 1):
+        steps[number] = step
+        text = " ∨ ".join(literal(lit) for lit in clause) or "⊥"
+        if isinstance(origin, tuple):
+            origin = f"resolve {steps[origin[0]]}, {steps[origin[1]]}"
+        elif origin == "support":
+            origin = "negated query"
+        lines.append(f"{step}. {text}    [{origin}]")
+    return lines
+
+
+def truth_table_columns(symbols):
+    """
+    Returns the columns of a truth table over a list of symbols, as
+    integers whose bit m is the value of each symbol in model m, where
+    model m gives symbol i the value of bit i of m. Also returns the
+    mask with a bit set for each of the 2^n models.
+    """
+    models = 1 << len(symbols)
+    mask = (1 << models) - 1
+    columns = dict()
+    for i, symbol in enumerate(symbols):
+        width = 1 << i
+        columns[symbol] = mask // ((1 << width) + 1) << width
+    return columns, mask
+
+
+def symbols_in_order(knowledge, query):
+    """
+    Returns the names of the symbols of the knowledge base and the query,
+    ordered so that symbols that occur in the same conjunct are close
+    together. Starting from the first conjunct, the conjuncts that share
+    a symbol with one already taken come next, breadth-first, whatever
+    order they are written in; the symbols of each conjunct are taken in
+    the order they occur in it.
+    """
+    sentences = (knowledge.conjuncts if isinstance(knowledge, And)
+                 else [knowledge]) + [query]
+    names = [occurrences(sentence) for sentence in sentences]
+    containing = dict()
+    for i, sentence_names in enumerate(names):
+        for name in sentence_names:
+            containing.setdefault(name, []).append(i)
+
+    order = dict()
+    taken = [False] * len(sentences)
+    for first in range(len(sentences)):
+        if taken[first]:
+            continue
+        taken[first] = True
+        queue = collections.deque([first])
+        while queue:
+            for name in names[queue.popleft()]:
+                if name in order:
+                    continue
+                order[name] = None
+                for i in containing[name]:
+                    if not taken[i]:
+                        taken[i] = True
+                        queue.append(i)
+    return list(order)
+
+
+def occurrences(sentence):
+    """
+    Returns the names of the symbols in `sentence`, in the order they
+    first occur when it is read left to right.
+    """
+    order = dict()
+    stack = [sentence]
+    while stack:
+        sentence = stack.pop()
+        if isinstance(sentence, Symbol):
+            order.setdefault(sentence.name)
+        elif isinstance(sentence, Not):
+            stack.append(sentence.operand)
+        elif isinstance(sentence, And):
+            stack.extend(reversed(sentence.conjuncts))
+        elif isinstance(sentence, Or):
+            stack.extend(reversed(sentence.disjuncts))
+        elif isinstance(sentence, Implication):
+            stack.extend((sentence.consequent, sentence.antecedent))
+        elif isinstance(sentence, Biconditional):
+            stack.extend((sentence.right, sentence.left))
+    return list(order)
+
+
+def model_check_bitwise(knowledge, query, block=20):
+    """
+    Checks if knowledge base entails query, by evaluating both in every
+    model at once with bitwise operations over truth-table columns.
+    Up to `block` symbols are evaluated in parallel; the models of any
+    remaining symbols are enumerated, one block of models at a time.
+    Both are simplified first, which can also eliminate symbols.
+    """
+    knowledge = knowledge.simplify()
+    query = query.simplify()
+    symbols = sorted(knowledge.symbols() | query.symbols())
+    parallel, rest = symbols[:block], symbols[block:]
+    columns, mask = truth_table_columns(parallel)
+
+    for values in itertools.product((0, mask), repeat=len(rest)):
+        columns.update(zip(rest, values))
+        # The query only matters in the models of the knowledge base
+        models = knowledge.evaluate_all(columns, mask)
+        if models and models & ~query.evaluate_all(columns, models):
+            return False
+    return True
+
+
+def model_check_many(knowledge, queries, block=20, limit=24):
+    """
+    Checks which of many queries the knowledge base entails, in one pass.
+    Returns a list with a bool for each query.
+
+    With up to `limit` symbols, the models of the knowledge base are
+    computed once per block of truth-table columns (see
+    `model_check_bitwise`) and every undecided query is checked against
+    them. With more symbols, the knowledge base is encoded once for a SAT
+    solver, and every model it finds refutes all the queries false in it.
+    """
+    knowledge = knowledge.simplify()
+    queries = [query.simplify() for query in queries]
+    symbols = sorted(knowledge.symbols().union(
+        *[query.symbols() for query in queries]
+    ))
+    if len(symbols) > limit:
+        return model_check_many_sat(knowledge, queries)
+
+    entailed = [True] * len(queries)
+    parallel, rest = symbols[:block], symbols[block:]
+    columns, mask = truth_table_columns(parallel)
+    for values in itertools.product((0, mask), repeat=len(rest)):
+        columns.update(zip(rest, values))
+        models = knowledge.evaluate_all(columns, mask)
+        if not models:
+            continue
+        for i, query in enumerate(queries):
+            if entailed[i] and models & ~query.evaluate_all(columns, models):
+                entailed[i] = False
+        if not any(entailed):
+            break
+    return entailed
+
+
+def model_check_many_sat(knowledge, queries):
+    """
+    Checks which of many queries the knowledge base entails, encoding the
+    knowledge base once for an incremental SAT solver.
+    """
+    return KnowledgeBase(knowledge).entails_all(queries)
+
+
+def model_check_enumerate(knowledge, query, processes=1, split=None):
+    """
+    Checks if knowledge base entails query, by enumerating the models of
+    their symbols depth-first, without recursion. Models are encoded as
+    integers, and any partial model in which the knowledge base is already
+    false, or the query already true, is pruned with all its completions.
+    Symbols are assigned in the order of `symbols_in_order`, so that the
+    conjuncts they occur in are decided early.
+
+    With more than one process, the models of the first `split` symbols
+    (by default, enough for four tasks per process) are divided among a
+    pool of workers, and every worker stops as soon as any of them finds
+    a model of the knowledge base in which the query is false.
+    """
+    symbols = symbols_in_order(knowledge, query)
+    if processes <= 1 or not symbols:
+        return check_models(knowledge, query, symbols, 0, 0)
+
+    if split is None:
+        split = (processes * 4 - 1).bit_length()
+    split = min(split, len(symbols))
+    tasks = [
+        (knowledge, query, symbols, split, prefix)
+        for prefix in range(1 << split)
+    ]
+
+    stop = multiprocessing.Event()
+    with multiprocessing.Pool(
+        processes, initializer=init_check_worker, initargs=(stop,)
+    ) as pool:
+        for entailed in pool.imap_unordered(check_prefix, tasks):
+            if not entailed:
+                stop.set()
+                return False
+    return True
+
+
+# Set in worker processes once any worker has found a counter-model
+stop_checking = None
+
+
+def init_check_worker(stop):
+    """Shares the stop event with a worker process."""
+    global stop_checking
+    stop_checking = stop
+
+
+def check_prefix(task):
+    """
+    Checks entailment in the models that give the first `split` symbols
+    the values of the bits of `prefix`.
+    """
+    knowledge, query, symbols, split, prefix = task
+    return check_models(
+        knowledge, query, symbols, (1 << split) - 1, prefix, stop_checking
+    )
+
+
+def check_models(knowledge, query, symbols, assigned, values, stop=None):
+    """
+    Checks if the query holds in every model of the knowledge base that
+    extends the partial model (`assigned`, `values`), where symbol i of
+    `symbols` is bit i. Returns early, treating the models as entailed,
+    once the `stop` event is set by another process.
+    """
+    bits = {symbol: 1 << i for i, symbol in enumerate(symbols)}
+    everything = (1 << len(symbols)) - 1
+    stack = [(assigned, values)]
+    visited = 0
+
+    while stack:
+        assigned, values = stack.pop()
+
+        visited += 1
+        if stop is not None and visited % 1024 == 0 and stop.is_set():
             return True
-        else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
-
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
-
-    # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
 
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+        # Prune models where the knowledge base is false
+        known = knowledge.evaluate_partial(bits, assigned, values)
+        if known is False:
+            continue
+
+        # Prune models where the query is true; a counter-model otherwise
+        holds = query.evaluate_partial(bits, assigned, values)
+        if holds is True:
+            continue
+        if holds is False and known is True:
+            return False
+        if assigned == everything:
+            continue
+
+        # Branch on the unassigned symbol that occurs first
+        bit = (assigned + 1) & ~assigned
+        stack.append((assigned | bit, values))
+        stack.append((assigned | bit, values | bit))
+
+    return True
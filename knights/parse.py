@@ -0,0 +1,310 @@
+import re
+
+from logic import *
+
+
+# A word of a symbol name: characters other than spaces and operators,
+# and "=" and "<" unless they begin an "=>" or "<=>"
+NAME_PART = r"(?:[^\s¬∧∨()⊤⊥=<]+|=(?!>)|<(?!=>))+"
+
+# A symbol name may contain spaces, but not at either end
+NAME = re.compile(rf"{NAME_PART}(?:\s+{NAME_PART})*")
+
+# Each token is an operator, a symbol name, or any other character (an error)
+TOKEN = re.compile(rf"\s*(?:(<=>|=>|[¬∧∨()⊤⊥])|({NAME.pattern})|(\S))")
+
+# A symbol, possibly negated
+LITERAL = re.compile(rf"\s*(?:¬\s*)*({NAME.pattern})\s*")
+
+# Characters only found in formulas other than a clause of literals (or
+# in names that contain "=" or "<")
+COMPOUND = re.compile(r"[()⊤⊥=<]")
+
+# Binding strength of each connective, loosest first
+PRECEDENCE = {Biconditional: 1, Implication: 2, Or: 3, And: 4, Not: 5}
+
+# Binary operators, as their precedence and connective
+OPERATORS = {"<=>": (1, Biconditional), "=>": (2, Implication),
+             "∨": (3, Or), "∧": (4, And)}
+
+
+class Parser():
+    """
+    Parser for the text syntax of `Sentence.formula`: symbol names, ⊤ and
+    ⊥, ¬, ∧, ∨, => and <=>, and parentheses. Connectives bind in that
+    order, tightest first; => and <=> group to the right. Chains such as
+    a ∧ b ∧ c become a single And (or Or) of all their operands.
+
+    Parsing is a single operator-precedence pass over the tokens, so it
+    is linear in the length of the text and not limited by the depth of
+    nesting. Text that is only literals joined by one connective, as the
+    clauses of most knowledge bases are, is split instead, which is
+    cheaper still. Symbols are looked up by name, and other sentences but
+    conjunctions by their connective and operands, in tables kept for
+    the parser's lifetime, so a parser reused across many formulas, such
+    as the lines of a knowledge base file, builds each of them once.
+    """
+
+    def __init__(self):
+        self.symbols = dict()
+        self.sentences = dict()
+        self.literals = dict()
+
+    def parse(self, text):
+        """Returns the sentence written as `text`."""
+        if not COMPOUND.search(text):
+            sentence = self.clause(text)
+            if sentence is not None:
+                return sentence
+
+        symbols = self.symbols
+        sentences = self.sentences
+        operands = []
+
+        # Pending operators: "(", "¬", or [precedence, connective, count]
+        # for a chain of `count` operands joined by one connective
+        operators = []
+        expect_operand = True
+
+        for operator, name, other in TOKEN.findall(text):
+            if name:
+                if not expect_operand:
+                    raise ValueError(f"unexpected {name!r}")
+                operand = symbols.get(name)
+                if operand is None:
+                    operand = symbols[name] = Symbol(name)
+            elif operator in OPERATORS:
+                if expect_operand:
+                    raise ValueError(f"unexpected {operator!r}")
+                precedence, connective = OPERATORS[operator]
+                top = operators[-1] if operators else None
+                if type(top) is list and top[0] > precedence:
+                    reduce(operands, operators, precedence, sentences)
+                    top = operators[-1] if operators else None
+                if type(top) is list and top[1] is connective:
+                    top[2] += 1
+                else:
+                    operators.append([precedence, connective, 2])
+                expect_operand = True
+                continue
+            elif operator == ")":
+                if expect_operand:
+                    raise ValueError("unexpected ')'")
+                reduce(operands, operators, 0, sentences)
+                if not operators:
+                    raise ValueError("unexpected ')'")
+                operators.pop()
+                operand = operands.pop()
+            elif not expect_operand or other:
+                raise ValueError(f"unexpected {operator or other!r}")
+            elif operator == "⊤" or operator == "⊥":
+                operand = TRUE if operator == "⊤" else FALSE
+            else:
+                operators.append(operator)
+                continue
+
+            # The operand is complete, so the negations before it apply
+            while operators and operators[-1] == "¬":
+                operators.pop()
+                operand = build(sentences, Not, operand)
+            operands.append(operand)
+            expect_operand = False
+
+        if expect_operand:
+            raise ValueError("unexpected end of formula")
+        reduce(operands, operators, 0, sentences)
+        if operators:
+            raise ValueError("expected ')'")
+        return operands[0]
+
+    def clause(self, text):
+        """
+        Returns the sentence written as `text` if it is literals joined by
+        a single connective, or else None. Such text needs no operator-
+        precedence pass: it is split at the connective, and each piece is
+        looked up as written, or else read as a name after its negations.
+        """
+        if "∨" in text:
+            if "∧" in text:
+                return None
+            connective, pieces = Or, text.split("∨")
+        elif "∧" in text:
+            connective, pieces = And, text.split("∧")
+        else:
+            connective, pieces = None, [text]
+
+        literals = self.literals
+        parts = []
+        for piece in pieces:
+            literal = literals.get(piece)
+            if literal is None:
+                match = LITERAL.fullmatch(piece)
+                if not match:
+                    return None
+                literal = self.symbols.get(match[1])
+                if literal is None:
+                    literal = self.symbols[match[1]] = Symbol(match[1])
+                for _ in range(piece.count("¬")):
+                    literal = build(self.sentences, Not, literal)
+                literals[piece] = literal
+            parts.append(literal)
+        if connective is None:
+            return parts[0]
+        return build(self.sentences, connective, *parts)
+
+
+def reduce(operands, operators, precedence, sentences):
+    """
+    Replaces the operands of every pending connective that binds tighter
+    than `precedence` with the sentence they form, stopping at "(".
+    Sentences are built through the parser's table `sentences`.
+    """
+    while operators and operators[-1] != "(" and operators[-1][0] > precedence:
+        _, connective, count = operators.pop()
+        parts = operands[-count:]
+        del operands[-count:]
+        if connective is And or connective is Or:
+            operands.append(build(sentences, connective, *parts))
+        else:
+            sentence = parts.pop()
+            while parts:
+                sentence = build(sentences, connective, parts.pop(), sentence)
+            operands.append(sentence)
+
+
+def build(sentences, connective, *parts):
+    """
+    Returns the sentence joining `parts` by `connective`, looked up in
+    the parser's table `sentences` before the table of all live
+    sentences. Every sentence a parser builds comes from its tables, so
+    equal parts are the same objects, and the parser's table is keyed by
+    their identities, which is far cheaper than looking the sentence up
+    among the live ones. Conjunctions can be modified, so each is built
+    anew, and other sentences hold (and are keyed by) frozen copies of
+    them.
+    """
+    if connective is And:
+        return And(*parts)
+    if not Interned.mutable.isdisjoint(map(type, parts)):
+        parts = [part.frozen() for part in parts]
+    key = (connective, *map(id, parts))
+    sentence = sentences.get(key)
+    if sentence is None:
+        sentence = sentences[key] = connective.intern(*parts)
+    return sentence
+
+def parse(text):
+    """Returns the sentence written as `text` (see `Parser`)."""
+    return Parser().parse(text)
+
+
+def serialize(sentence):
+    """
+    Returns `sentence` as text that `parse` reads back as the same
+    sentence. Unlike `Sentence.formula`, only the parentheses needed by
+    the precedence of the connectives are written. Conjunctions and
+    disjunctions of a single operand are written as that operand, and
+    empty ones as ⊤ and ⊥.
+    """
+    pieces = []
+    write(sentence, pieces)
+    return "".join(pieces)
+
+
+def unwrap(sentence):
+    """Returns the sentence that a conjunction or disjunction of fewer
+    than two operands is written as."""
+    while isinstance(sentence, (And, Or)):
+        operands = (sentence.conjuncts if isinstance(sentence, And)
+                    else sentence.disjuncts)
+        if len(operands) > 1:
+            break
+        if not operands:
+            return TRUE if isinstance(sentence, And) else FALSE
+        sentence = operands[0]
+    return sentence
+
+
+def write(sentence, pieces):
+    """
+    Appends the text of `sentence` to `pieces`. Like `Parser.parse`, it
+    keeps a stack instead of recursing, so it is not limited by the depth
+    of nesting: the stack holds text still to be appended, and sentences
+    still to be written with the precedence of the connective they are an
+    operand of, which they are parenthesized within if they bind no
+    tighter.
+    """
+    stack = [(sentence, 0)]
+    while stack:
+        item = stack.pop()
+        if type(item) is str:
+            pieces.append(item)
+            continue
+        sentence, parent = item
+        sentence = unwrap(sentence)
+        kind = And if isinstance(sentence, And) else type(sentence)
+        if kind is Symbol:
+            if not NAME.fullmatch(sentence.name):
+                raise ValueError(f"cannot write symbol {sentence.name!r}")
+            pieces.append(sentence.name)
+            continue
+        if kind is Constant:
+            pieces.append(sentence.formula())
+            continue
+        if kind not in PRECEDENCE:
+            raise TypeError("must be a logical sentence")
+
+        # What follows is pushed in reverse, the last text first
+        precedence = PRECEDENCE[kind]
+        if precedence <= parent:
+            pieces.append("(")
+            stack.append(")")
+        if kind is Not:
+            pieces.append("¬")
+            stack.append((sentence.operand, precedence - 1))
+        elif kind is And or kind is Or:
+            operands, separator = ((sentence.conjuncts, " ∧ ") if kind is And
+                                   else (sentence.disjuncts, " ∨ "))
+            for operand in reversed(operands[1:]):
+                stack.append((operand, precedence))
+                stack.append(separator)
+            stack.append((operands[0], precedence))
+        elif kind is Implication:
+            stack.append((sentence.consequent, precedence))
+            stack.append(" => ")
+            stack.append((sentence.antecedent, precedence))
+        else:
+            stack.append((sentence.right, precedence))
+            stack.append(" <=> ")
+            stack.append((sentence.left, precedence))
+
+
+def read_knowledge(filename):
+    """
+    Reads a knowledge base file into a conjunction of its sentences.
+    Each non-empty line holds one sentence; lines starting with "#" are
+    ignored.
+    """
+    parser = Parser()
+    knowledge = And()
+    with open(filename, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            try:
+                knowledge.add(parser.parse(line))
+            except ValueError as e:
+                raise ValueError(f"{filename}:{number}: {e}") from None
+    return knowledge
+
+
+def write_knowledge(knowledge, filename):
+    """
+    Writes a knowledge base to a file that `read_knowledge` reads back,
+    one conjunct per line.
+    """
+    sentences = (knowledge.conjuncts if isinstance(knowledge, And)
+                 else [knowledge])
+    with open(filename, "w", encoding="utf-8") as f:
+        for sentence in sentences:
+            f.write(serialize(sentence) + "\n")
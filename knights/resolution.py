@@ -0,0 +1,162 @@
+import heapq
+
+
+class Prover():
+    """
+    Resolution refutation prover over clauses of integer literals, where
+    variables are numbered from 1 and a negative literal is a negated
+    variable (the DIMACS convention).
+
+    Uses the set-of-support strategy: clauses are split into background
+    clauses, which are never resolved with each other, and supporting
+    clauses (such as those of a negated query), and every resolvent has
+    a supporting clause among its ancestors. This is complete as long as
+    the background clauses are satisfiable.
+
+    Supporting clauses are taken shortest first and resolved against the
+    processed clauses containing a complementary literal, found through a
+    literal index. Resolvents subsumed by a kept clause are discarded
+    (forward subsumption), and kept clauses subsumed by a new resolvent
+    are deleted (backward subsumption).
+
+    Every clause records how it was derived, so a refutation can be
+    returned as a proof.
+    """
+
+    def __init__(self, background=(), support=()):
+        # Every clause ever added, by number, and how each was derived:
+        # a label for input clauses, or the numbers of the two parents
+        self.clauses = []
+        self.origins = []
+        self.active = set()
+
+        # Literal indexes of the active clauses, and of the active
+        # clauses that can be resolved against
+        self.occurrences = dict()
+        self.usable = dict()
+        self.queue = []
+        self.empty = None
+
+        for clause in background:
+            self.add(clause, "knowledge", usable=True)
+        for clause in support:
+            self.add(clause, "support")
+
+    def add(self, lits, origin, usable=False):
+        """
+        Add a clause unless it is a tautology or subsumed, deleting any
+        clauses it subsumes. Supporting clauses are queued to be resolved
+        and usable clauses are indexed to be resolved against.
+        Return the number of the clause, or None if it was not added.
+        """
+        clause = frozenset(lits)
+        if any(-lit in clause for lit in clause) or self.subsumed(clause):
+            return None
+
+        number = len(self.clauses)
+        self.clauses.append(clause)
+        self.origins.append(origin)
+        if not clause:
+            self.empty = number
+            return number
+
+        for other in self.subsumes(clause):
+            self.remove(other)
+        self.active.add(number)
+        for lit in clause:
+            self.occurrences.setdefault(lit, set()).add(number)
+        if usable:
+            self.use(number)
+        else:
+            heapq.heappush(self.queue, (len(clause), number))
+        return number
+
+    def use(self, number):
+        """Index a clause to be resolved against."""
+        for lit in self.clauses[number]:
+            self.usable.setdefault(lit, set()).add(number)
+
+    def remove(self, number):
+        """Delete a clause from the indexes."""
+        self.active.discard(number)
+        for lit in self.clauses[number]:
+            self.occurrences[lit].discard(number)
+            if lit in self.usable:
+                self.usable[lit].discard(number)
+
+    def subsumed(self, clause):
+        """Check if an active clause is a subset of `clause`."""
+        counts = dict()
+        for lit in clause:
+            for other in self.occurrences.get(lit, ()):
+                counts[other] = counts.get(other, 0) + 1
+                if counts[other] == len(self.clauses[other]):
+                    return True
+        return False
+
+    def subsumes(self, clause):
+        """Return the active clauses that are supersets of `clause`."""
+        candidates = None
+        for lit in sorted(clause,
+                          key=lambda lit: len(self.occurrences.get(lit, ()))):
+            containing = self.occurrences.get(lit, set())
+            candidates = (set(containing) if candidates is None
+                          else candidates & containing)
+            if not candidates:
+                return set()
+        return candidates
+
+    def prove(self, limit=None):
+        """
+        Resolve supporting clauses until the empty clause is derived.
+        Return True if it is, False if no new clause can be derived, and
+        None if `limit` clauses have been derived without either.
+        """
+        while self.empty is None:
+            if not self.queue:
+                return False
+            if limit is not None and len(self.clauses) >= limit:
+                return None
+
+            _, given = heapq.heappop(self.queue)
+            if given not in self.active:
+                continue
+            self.use(given)
+
+            clause = self.clauses[given]
+            for lit in clause:
+                for other in list(self.usable.get(-lit, ())):
+                    if other not in self.active:
+                        continue
+                    resolvent = (clause - {lit}) | (self.clauses[other] - {-lit})
+                    self.add(resolvent, (given, other))
+                    if self.empty is not None or given not in self.active:
+                        break
+                if self.empty is not None or given not in self.active:
+                    break
+        return True
+
+    def proof(self):
+        """
+        Return the refutation found by `prove`, as a list of
+        (number, clause, origin) for every clause it uses, parents first.
+        Return None if no refutation has been found.
+        """
+        if self.empty is None:
+            return None
+
+        # Collect the ancestors of the empty clause, without recursion
+        used = set()
+        pending = [self.empty]
+        while pending:
+            number = pending.pop()
+            if number in used:
+                continue
+            used.add(number)
+            if isinstance(self.origins[number], tuple):
+                pending.extend(self.origins[number])
+        return [
+            (number, sorted(self.clauses[number], key=abs),
+             self.origins[number])
+            for number in sorted(used)
+        ]
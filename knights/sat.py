@@ -0,0 +1,360 @@
+import heapq
+
+
+class Solver():
+    """
+    CDCL satisfiability solver over clauses of integer literals, where
+    variables are numbered from 1 and a negative literal is a negated
+    variable (the DIMACS convention).
+
+    Uses two watched literals per clause for unit propagation, first-UIP
+    clause learning with non-chronological backtracking, VSIDS variable
+    activities with phase saving, and Luby-sequence restarts.
+
+    The solver is incremental: clauses can be added between calls to
+    `solve`, and learned clauses, activities and top-level assignments
+    carry over. `solve` can also decide satisfiability under temporary
+    assumptions, which are forgotten afterwards.
+    """
+
+    RESTART_BASE = 100
+    ACTIVITY_DECAY = 0.95
+
+    def __init__(self):
+        self.num_vars = 0
+        self.clauses = []
+        self.learnts = []
+        self.watches = dict()
+        self.unsatisfiable = False
+
+        # Assignment state: values by literal, everything else by variable
+        self.values = dict()
+        self.levels = [0]
+        self.reasons = [None]
+        self.phases = [False]
+        self.activity = [0.0]
+        self.activity_inc = 1.0
+        self.heap = []
+
+        # Assigned literals in order, with the trail index of each level
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+
+        self.model = None
+        self.conflicts = 0
+        self.simplified = -1
+
+    def new_var(self):
+        """Add a new variable and return its number."""
+        self.num_vars += 1
+        var = self.num_vars
+        self.values[var] = 0
+        self.values[-var] = 0
+        self.levels.append(0)
+        self.reasons.append(None)
+        self.phases.append(False)
+        self.activity.append(0.0)
+        self.watches[var] = []
+        self.watches[-var] = []
+        heapq.heappush(self.heap, (0.0, var))
+        return var
+
+    def value(self, lit):
+        """Return 1 if `lit` is true, -1 if it is false, 0 if unassigned."""
+        return self.values[lit]
+
+    def add_clause(self, lits):
+        """
+        Add a clause, given as an iterable of literals, creating any
+        variables it mentions. Return False if the clause set is now known
+        to be unsatisfiable.
+        """
+        clause = []
+        present = set()
+        for lit in lits:
+            while abs(lit) > self.num_vars:
+                self.new_var()
+            if -lit in present:
+                return True
+            if lit not in present:
+                present.add(lit)
+                clause.append(lit)
+
+        # Literals fixed and propagated at the top level simplify the
+        # clause; anything not yet propagated is handled by `solve`
+        if self.unsatisfiable:
+            return False
+        if self.qhead:
+            if any(self.values[lit] > 0 and self.levels[abs(lit)] == 0
+                   for lit in clause):
+                return True
+            clause = [lit for lit in clause
+                      if not (self.values[lit] < 0
+                              and self.levels[abs(lit)] == 0)]
+
+        if not clause:
+            self.unsatisfiable = True
+        elif len(clause) == 1:
+            if self.value(clause[0]) < 0:
+                self.unsatisfiable = True
+            elif self.value(clause[0]) == 0:
+                self.enqueue(clause[0], None)
+        else:
+            self.clauses.append(clause)
+            self.watch(clause)
+        return not self.unsatisfiable
+
+    def watch(self, clause):
+        """Watch the first two literals of a clause."""
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+
+    def enqueue(self, lit, reason):
+        """Assign `lit` true at the current level, implied by `reason`."""
+        var = abs(lit)
+        self.values[lit] = 1
+        self.values[-lit] = -1
+        self.levels[var] = len(self.trail_lim)
+        self.reasons[var] = reason
+        self.trail.append(lit)
+
+    def propagate(self):
+        """
+        Propagate every assignment on the trail through the watched
+        literals. Return a conflicting clause, or None.
+        """
+        values = self.values
+        watches = self.watches
+        trail = self.trail
+        while self.qhead < len(trail):
+            false_lit = -trail[self.qhead]
+            self.qhead += 1
+
+            watchers = watches[false_lit]
+            watches[false_lit] = kept = []
+            i = 0
+            while i < len(watchers):
+                clause = watchers[i]
+                i += 1
+
+                # Keep the false literal in the second position
+                first = clause[0]
+                if first == false_lit:
+                    first = clause[0] = clause[1]
+                    clause[1] = false_lit
+                if values[first] > 0:
+                    kept.append(clause)
+                    continue
+
+                # Look for a new literal to watch
+                for k in range(2, len(clause)):
+                    lit = clause[k]
+                    if values[lit] >= 0:
+                        clause[1] = lit
+                        clause[k] = false_lit
+                        watches[lit].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if values[first] < 0:
+                        kept.extend(watchers[i:])
+                        return clause
+                    self.enqueue(first, clause)
+        return None
+
+    def simplify(self):
+        """
+        Remove the clauses that are satisfied by top-level assignments, and
+        the literals that are falsified by them, since neither can ever
+        propagate or conflict again.
+        Must be called at level 0 after propagation.
+        """
+        def fixed(lit):
+            return self.values[lit] != 0 and self.levels[abs(lit)] == 0
+
+        def reduce(clauses):
+            reduced = []
+            for clause in clauses:
+                if any(self.values[lit] > 0 and fixed(lit) for lit in clause):
+                    continue
+                clause[:] = [lit for lit in clause if not fixed(lit)]
+                reduced.append(clause)
+            return reduced
+
+        self.clauses = reduce(self.clauses)
+        self.learnts = reduce(self.learnts)
+        for lit in self.watches:
+            self.watches[lit] = []
+        for clause in self.clauses + self.learnts:
+            self.watch(clause)
+
+    def analyze(self, conflict):
+        """
+        Derive the first-UIP clause learned from a conflict.
+        Return the clause, asserting literal first, and the level to
+        backtrack to.
+        """
+        level = len(self.trail_lim)
+        seen = set()
+        learnt = [None]
+        pending = 0
+        index = len(self.trail) - 1
+        clause = conflict
+        lit = None
+
+        while True:
+            for q in (clause if lit is None else clause[1:]):
+                var = abs(q)
+                if var not in seen and self.levels[var] > 0:
+                    seen.add(var)
+                    self.bump(var)
+                    if self.levels[var] == level:
+                        pending += 1
+                    else:
+                        learnt.append(q)
+
+            # Walk back to the next literal of this level in the conflict
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            lit = self.trail[index]
+            index -= 1
+            clause = self.reasons[abs(lit)]
+            seen.discard(abs(lit))
+            pending -= 1
+            if pending == 0:
+                break
+
+        learnt[0] = -lit
+        if len(learnt) == 1:
+            return learnt, 0
+
+        # The literal of the highest remaining level is watched second
+        highest = max(range(1, len(learnt)),
+                      key=lambda k: self.levels[abs(learnt[k])])
+        learnt[1], learnt[highest] = learnt[highest], learnt[1]
+        return learnt, self.levels[abs(learnt[1])]
+
+    def bump(self, var):
+        """Increase the activity of a variable involved in a conflict."""
+        self.activity[var] += self.activity_inc
+        if self.activity[var] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.activity_inc *= 1e-100
+            self.heap = [(-self.activity[v], v)
+                         for v in range(1, self.num_vars + 1)]
+            heapq.heapify(self.heap)
+        else:
+            heapq.heappush(self.heap, (-self.activity[var], var))
+
+    def backtrack(self, level):
+        """Undo every assignment above `level`."""
+        if len(self.trail_lim) <= level:
+            return
+        for lit in self.trail[self.trail_lim[level]:]:
+            var = abs(lit)
+            self.phases[var] = lit > 0
+            self.values[lit] = 0
+            self.values[-lit] = 0
+            self.reasons[var] = None
+            heapq.heappush(self.heap, (-self.activity[var], var))
+        del self.trail[self.trail_lim[level]:]
+        del self.trail_lim[level:]
+        self.qhead = len(self.trail)
+
+    def decide(self):
+        """
+        Return the unassigned variable with the highest activity, as a
+        literal in its saved phase, or None if every variable is assigned.
+        """
+        while self.heap:
+            _, var = heapq.heappop(self.heap)
+            if self.values[var] == 0:
+                return var if self.phases[var] else -var
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Decide whether the clauses are satisfiable with every literal in
+        `assumptions` true. If they are, return True and store a satisfying
+        assignment in `self.model`, as a dict from variable to bool;
+        otherwise return False.
+        """
+        self.model = None
+        for lit in assumptions:
+            while abs(lit) > self.num_vars:
+                self.new_var()
+        if self.unsatisfiable:
+            return False
+        if self.propagate() is not None:
+            self.unsatisfiable = True
+            return False
+        if self.simplified != len(self.trail):
+            self.simplify()
+            self.simplified = len(self.trail)
+
+        restarts = 0
+        budget = Solver.RESTART_BASE * luby(restarts)
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                if not self.trail_lim:
+                    self.unsatisfiable = True
+                    return False
+
+                learnt, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learnt) == 1:
+                    self.enqueue(learnt[0], None)
+                else:
+                    self.learnts.append(learnt)
+                    self.watch(learnt)
+                    self.enqueue(learnt[0], learnt)
+                self.activity_inc /= Solver.ACTIVITY_DECAY
+
+                budget -= 1
+                if budget <= 0:
+                    restarts += 1
+                    budget = Solver.RESTART_BASE * luby(restarts)
+                    self.backtrack(0)
+                continue
+
+            # Assumptions are decided first, one level each
+            lit = None
+            while len(self.trail_lim) < len(assumptions):
+                assumption = assumptions[len(self.trail_lim)]
+                if self.values[assumption] < 0:
+                    self.backtrack(0)
+                    return False
+                self.trail_lim.append(len(self.trail))
+                if self.values[assumption] == 0:
+                    lit = assumption
+                    break
+            if lit is not None:
+                self.enqueue(lit, None)
+                continue
+
+            lit = self.decide()
+            if lit is None:
+                self.model = {
+                    var: self.values[var] > 0
+                    for var in range(1, self.num_vars + 1)
+                }
+                self.backtrack(0)
+                return True
+            self.trail_lim.append(len(self.trail))
+            self.enqueue(lit, None)
+
+
+def luby(i):
+    """Return the `i`th element (from 0) of the Luby restart sequence."""
+    size, power = 1, 0
+    while size < i + 1:
+        power += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) // 2
+        power -= 1
+        i = i % size
+    return 2 ** power
@@ -0,0 +1,364 @@
+import collections.abc
+import time
+
+from minesweeper import Sentence, MinesweeperAI
+
+
+class BitSentence(Sentence):
+    """
+    Logical statement about a Minesweeper game, with its cells stored as
+    an integer bitmask: cell (i, j) of a board `width` cells wide is bit
+    i * width + j.
+
+    The mask is kept shifted down to its lowest cell, whose bit index is
+    `offset`, so that a sentence about a few neighboring cells is a small
+    integer wherever it lies on the board. Like `Sentence`, it is
+    immutable, and equal to any sentence with the same mask and count.
+    """
+
+    def __init__(self, bits, count, width, offset=0):
+        if bits:
+            low = (bits & -bits).bit_length() - 1
+            bits >>= low
+            offset += low
+        self.bits = bits
+        self.offset = offset
+        self.count = count
+        self.width = width
+        self.hash = hash((bits, offset, count))
+        self.length = bin(bits).count("1")
+        self._indices = None
+
+    @property
+    def cells(self):
+        return {divmod(index, self.width) for index in self.indices()}
+
+    def __eq__(self, other):
+        return (self.bits == other.bits and self.offset == other.offset
+                and self.count == other.count)
+
+    def __hash__(self):
+        return self.hash
+
+    def size(self):
+        """Returns the number of cells in the sentence."""
+        return self.length
+
+    def indices(self):
+        """
+        Returns the bit indices of the cells, in increasing order, listed
+        the first time they are needed: when the sentence is indexed or
+        its cells are marked, so not for a duplicate that is never stored.
+        """
+        if self._indices is None:
+            self._indices = indices_of(self.bits, self.offset)
+        return self._indices
+
+    def within(self, other):
+        """Checks if every cell of this sentence is in `other`."""
+        shift = self.offset - other.offset
+        return shift >= 0 and not (self.bits << shift) & ~other.bits
+
+    def minus(self, other):
+        """
+        Returns the cells of this sentence that are not in `other`, as a
+        mask and its offset.
+        """
+        shift = other.offset - self.offset
+        if shift >= 0:
+            return self.bits & ~(other.bits << shift), self.offset
+        return (self.bits << -shift) & ~other.bits, other.offset
+
+    def remove(self, index, mines):
+        """
+        Returns the sentence without the cell of bit index `index`, and
+        with `mines` fewer mines, if it mentions the cell, and this
+        sentence otherwise.
+        """
+        shift = index - self.offset
+        if shift < 0 or not self.bits >> shift & 1:
+            return self
+        return BitSentence(self.bits & ~(1 << shift), self.count - mines,
+                           self.width, self.offset)
+
+    def mark_mine(self, cell):
+        """
+        Returns the sentence given the fact that a cell is known to be
+        a mine, as `Sentence.mark_mine`.
+        """
+        return self.remove(cell[0] * self.width + cell[1], 1)
+
+    def mark_safe(self, cell):
+        """
+        Returns the sentence given the fact that a cell is known to be
+        safe, as `Sentence.mark_safe`.
+        """
+        return self.remove(cell[0] * self.width + cell[1], 0)
+
+
+class BitboardAI(MinesweeperAI):
+    """
+    Minesweeper game player whose sentences are `BitSentence`s: subset
+    tests, differences and counts in the inference loop are then single
+    integer operations instead of set operations, and `containing`
+    indexes the sentences by the bit index of each of their cells rather
+    than by the cell.
+
+    The moves made, known mines and safe cells are `CellMask`s, masks
+    of cells one per row of the board, so that the unknown neighbors of
+    a cell are read from three rows of them. Masks over the whole board
+    would be integers as large as the board, and every operation on them
+    would take time proportional to its size.
+
+    Most of the time of a move goes to bookkeeping shared with
+    `MinesweeperAI` (the cell pools, the index and the worklist), so a
+    move is only somewhat faster than with sets of cells.
+    """
+
+    def __init__(self, height=8, width=8, mines=8, trace=None):
+        super().__init__(height, width, mines, trace)
+        self.moves_made = CellMask(height, width)
+        self.mines = CellMask(height, width)
+        self.safes = CellMask(height, width)
+
+    def bit(self, cell):
+        """Returns the mask of a single cell."""
+        return 1 << (cell[0] * self.width + cell[1])
+
+    def mark_mine(self, cell):
+        """
+        Marks a cell as a mine, and updates all knowledge
+        to mark that cell as a mine as well.
+        """
+        if cell in self.mines:
+            return
+        self.mines.add(cell)
+        self.unknown.discard(cell)
+        index = cell[0] * self.width + cell[1]
+        for number in self.containing.pop(index, ()):
+            self.update(number, lambda sentence: sentence.remove(index, 1))
+
+    def mark_safe(self, cell):
+        """
+        Marks a cell as safe, and updates all knowledge
+        to mark that cell as safe as well.
+        """
+        if cell in self.safes:
+            return
+        self.safes.add(cell)
+        if cell in self.unknown:
+            self.pending.add(cell)
+        index = cell[0] * self.width + cell[1]
+        for number in self.containing.pop(index, ()):
+            self.update(number, lambda sentence: sentence.remove(index, 0))
+
+    def add_sentence(self, cells, count):
+        """
+        Adds a sentence that `count` of `cells` are mines, leaving out
+        cells already known to be mines or safe, unless the knowledge
+        base already holds it. The sentence is queued for inference.
+        """
+        bits = 0
+        for cell in cells:
+            if cell in self.mines:
+                count -= 1
+            elif cell not in self.safes:
+                bits |= self.bit(cell)
+        if bits:
+            self.store(BitSentence(bits, count, self.width))
+
+    def store(self, sentence):
+        """
+        Numbers and indexes a new sentence, as `MinesweeperAI.store`,
+        by the bit indices of its cells.
+        """
+        if sentence in self.numbers:
+            return
+
+        number = self.next_number
+        self.next_number += 1
+        self.stats.sentences_created += 1
+        self.knowledge[number] = sentence
+        self.numbers[sentence] = number
+        for index in sentence.indices():
+            self.containing.setdefault(index, set()).add(number)
+        self.dirty.add(number)
+
+    def remove_sentence(self, number):
+        """Removes a sentence from the knowledge base and its indexes."""
+        sentence = self.knowledge.pop(number)
+        self.stats.sentences_pruned += 1
+        if self.numbers.get(sentence) == number:
+            del self.numbers[sentence]
+        for index in sentence.indices():
+            self.containing[index].discard(number)
+        self.dirty.discard(number)
+
+    def infer(self):
+        """
+        Draws inferences from changed sentences until nothing changes,
+        as `MinesweeperAI.infer`, with masks for subsets and differences.
+        """
+        width = self.width
+        rounds = subset_checks = 0
+        while self.dirty:
+            number = self.dirty.pop()
+            sentence = self.knowledge[number]
+            rounds += 1
+
+            if sentence.count == 0 or sentence.count == sentence.length:
+                mines = sentence.count > 0
+                self.remove_sentence(number)
+                for index in sentence.indices():
+                    if mines:
+                        self.mark_mine(divmod(index, width))
+                    else:
+                        self.mark_safe(divmod(index, width))
+                continue
+
+            # Only sentences sharing a cell can be subsets or supersets
+            related = set()
+            for index in sentence.indices():
+                related |= self.containing[index]
+            related.discard(number)
+            subset_checks += len(related)
+            for other_number in related:
+                other = self.knowledge.get(other_number)
+                if other is None:
+                    continue
+                if sentence.length < other.length and sentence.within(other):
+                    bits, offset = other.minus(sentence)
+                    self.store(BitSentence(bits, other.count - sentence.count,
+                                           width, offset))
+                    self.remove_sentence(other_number)
+                elif other.length < sentence.length and other.within(sentence):
+                    bits, offset = sentence.minus(other)
+                    self.store(BitSentence(bits, sentence.count - other.count,
+                                           width, offset))
+                    self.remove_sentence(number)
+                    break
+
+        self.stats.rounds += rounds
+        self.stats.subset_checks += subset_checks
+
+    def add_knowledge(self, cell, count):
+        """
+        Called when the Minesweeper board tells us, for a given
+        safe cell, how many neighboring cells have mines in them.
+        See `MinesweeperAI.add_knowledge`.
+        """
+        start = time.perf_counter()
+        self.moves_made.add(cell)
+        self.unknown.discard(cell)
+        self.pending.discard(cell)
+        self.mark_safe(cell)
+
+        # The unknown neighbors in each row are a run of up to three bits,
+        # and the mask of them all starts at the top left neighbor
+        width = self.width
+        top, left = max(cell[0] - 1, 0), max(cell[1] - 1, 0)
+        run = (1 << (min(cell[1] + 2, width) - left)) - 1
+        mine_rows, safe_rows = self.mines.rows, self.safes.rows
+        bits = shift = 0
+        mines = count
+        for x in range(top, min(cell[0] + 2, self.height)):
+            mines -= bin(mine_rows[x] >> left & run).count("1")
+            bits |= (~(mine_rows[x] | safe_rows[x]) >> left & run) << shift
+            shift += width
+        if bits:
+            self.store(BitSentence(bits, mines, width, top * width + left))
+
+        self.propagate()
+        self.stats.add_move(cell, count, len(self.knowledge),
+                            time.perf_counter() - start)
+
+    def frontier_components(self):
+        """
+        Returns the components of the frontier, as
+        `MinesweeperAI.frontier_components`, following the index of
+        sentences by bit index.
+        """
+        width = self.width
+        components = []
+        seen = set()
+        for start in self.containing:
+            if start in seen or not self.containing[start]:
+                continue
+            seen.add(start)
+            indices = [start]
+            numbers = set()
+            for index in indices:
+                for number in self.containing[index]:
+                    if number in numbers:
+                        continue
+                    numbers.add(number)
+                    for other in self.knowledge[number].indices():
+                        if other not in seen:
+                            seen.add(other)
+                            indices.append(other)
+            sentences = [
+                (self.knowledge[number].cells, self.knowledge[number].count)
+                for number in sorted(numbers)
+            ]
+            components.append(
+                ([divmod(index, width) for index in indices], sentences)
+            )
+        return components
+
+
+class CellMask(collections.abc.MutableSet):
+    """
+    Set of cells of a board, stored as an integer mask per row of the
+    board: cell (i, j) is bit j of row i. It compares with, and combines
+    into, ordinary sets of cells.
+    """
+
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.rows = [0] * height
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, cell):
+        i, j = cell
+        if not (0 <= i < self.height and 0 <= j < self.width):
+            return False
+        return self.rows[i] >> j & 1 == 1
+
+    def __iter__(self):
+        for i, row in enumerate(self.rows):
+            for j in indices_of(row):
+                yield (i, j)
+
+    def add(self, cell):
+        i, j = cell
+        if not self.rows[i] >> j & 1:
+            self.rows[i] |= 1 << j
+            self.size += 1
+
+    def discard(self, cell):
+        i, j = cell
+        if self.rows[i] >> j & 1:
+            self.rows[i] &= ~(1 << j)
+            self.size -= 1
+
+    @classmethod
+    def _from_iterable(cls, cells):
+        return set(cells)
+
+
+def indices_of(bits, offset=0):
+    """
+    Returns the bit indices of the set bits of a mask, in increasing
+    order, where bit 0 of the mask is at bit index `offset`.
+    """
+    indices = []
+    while bits:
+        low = bits & -bits
+        indices.append(offset + low.bit_length() - 1)
+        bits ^= low
+    return indices
+
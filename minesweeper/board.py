@@ -0,0 +1,51 @@
+import random
+
+import numpy as np
+
+from minesweeper import Minesweeper
+
+
+class Board(Minesweeper):
+    """
+    Minesweeper game representation backed by NumPy arrays, for boards
+    far larger than the classic ones.
+
+    Mines are placed by sampling cells without replacement, and the
+    number of mines next to every cell is computed once, by summing the
+    eight shifted copies of the board, so revealing a cell is a lookup.
+    The board's random numbers are drawn from the `random` module's
+    state, so seeding it still reproduces the game.
+    """
+
+    def __init__(self, height=8, width=8, mines=8):
+
+        self.height = height
+        self.width = width
+        self.mines_found = set()
+
+        rng = np.random.default_rng(random.getrandbits(64))
+        positions = rng.choice(height * width, size=mines, replace=False)
+        self.board = np.zeros((height, width), dtype=bool)
+        self.board.flat[positions] = True
+        rows, columns = np.divmod(positions, width)
+        self.mines = set(zip(rows.tolist(), columns.tolist()))
+
+        # Neighbor counts, from the board padded with a ring of no mines
+        padded = np.zeros((height + 2, width + 2), dtype=np.uint8)
+        padded[1:-1, 1:-1] = self.board
+        self.counts = np.zeros((height, width), dtype=np.uint8)
+        for di in range(3):
+            for dj in range(3):
+                if (di, dj) != (1, 1):
+                    self.counts += padded[di:di + height, dj:dj + width]
+
+    def is_mine(self, cell):
+        return bool(self.board[cell])
+
+    def nearby_mines(self, cell):
+        """
+        Returns the number of mines that are
+        within one row and column of a given cell,
+        not including the cell itself.
+        """
+        return int(self.counts[cell])
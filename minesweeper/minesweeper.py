@@ -1,4 +1,8 @@
+import json
+import math
 import random
+import time
+from array import array
 
 
 class Minesweeper():
@@ -89,53 +93,64 @@ class Sentence():
     Logical statement about a Minesweeper game
     A sentence consists of a set of board cells,
     and a count of the number of those cells which are mines.
+
+    Sentences are immutable: the cells are a frozenset, and marking a
+    cell returns a new sentence rather than changing this one. Two
+    sentences with the same cells and count are equal and hash alike, so
+    a sentence can key a dict.
     """
 
     def __init__(self, cells, count): # Initialisation using a constructor method
-        self.cells = set(cells)
+        self.cells = frozenset(cells)
         self.count = count
-        self.mines = set()
-        self.safes = set()
 
     def __eq__(self, other): # Methods are defined here
         return self.cells == other.cells and self.count == other.count
 
     def __hash__(self):
-        return hash((tuple(self.cells), self.count))
+        return hash((self.cells, self.count))
 
     def __str__(self):
-        return f"{self.cells} = {self.count}"
+        return f"{set(self.cells)} = {self.count}"
+
+    def size(self):
+        """Returns the number of cells in the sentence."""
+        return len(self.cells)
 
     def known_mines(self):
         """
         Returns the set of all cells in self.cells known to be mines.
         """
-        return self.mines
+        if self.count == len(self.cells):
+            return set(self.cells)
+        return set()
 
     def known_safes(self):
         """
         Returns the set of all cells in self.cells known to be safe.
         """
-        return self.safes
+        if self.count == 0:
+            return set(self.cells)
+        return set()
 
     def mark_mine(self, cell):
         """
-        Updates internal knowledge representation given the fact that
-        a cell is known to be a mine.
+        Returns the sentence given the fact that a cell is known to be
+        a mine: without the cell and with one mine fewer if it mentions
+        the cell, and unchanged otherwise.
         """
-        if cell in self.cells:
-            self.mines.add(cell)
-            self.cells.remove(cell)
-            self.count -= 1
+        if cell not in self.cells:
+            return self
+        return Sentence(self.cells - {cell}, self.count - 1)
 
     def mark_safe(self, cell):
         """
-        Updates internal knowledge representation given the fact that
-        a cell is known to be safe.
+        Returns the sentence given the fact that a cell is known to be
+        safe: without the cell if it mentions it, and unchanged otherwise.
         """
-        if cell in self.cells:
-            self.safes.add(cell)
-            self.cells.remove(cell)
+        if cell not in self.cells:
+            return self
+        return Sentence(self.cells - {cell}, self.count)
 
 
 class MinesweeperAI():
@@ -143,11 +158,24 @@ class MinesweeperAI():
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    # Frontier components with more cells than this are not enumerated
+    COMPONENT_LIMIT = 48
 
-        # Initial width and height are initialised
+    # Guesses off the frontier consider every such cell on boards with
+    # up to this many unknown cells, and a random sample of them otherwise
+    SCAN_LIMIT = 4096
+    SAMPLE_SIZE = 64
+
+    def __init__(self, height=8, width=8, mines=8, trace=None):
+
+        # Initial width and height are initialised, with the number of
+        # mines on the board, which weights guesses
         self.height = height
         self.width = width
+        self.mine_count = mines
+
+        # Counters and timers of the AI's work, traced to a file if given
+        self.stats = Stats(trace)
 
         # Track of cells clicked on are tracked
         self.moves_made = set()
@@ -156,28 +184,166 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # Sentences of truth are stored in this set
-        self.knowledge = set()
+        # Sentences of truth are stored by number, with an index from
+        # each cell to the sentences that mention it and from each
+        # sentence to its number, so no sentence is stored twice. Only
+        # sentences about unknown cells are kept, and none that another
+        # pair of sentences implies, so the knowledge base grows with the
+        # frontier rather than with the moves made
+        self.knowledge = dict()
+        self.containing = dict()
+        self.numbers = dict()
+        self.next_number = 0
+
+        # Sentences that have changed since inferences were last drawn
+        self.dirty = set()
+
+        # Cells not chosen nor known to be mines, and the known safe cells
+        # among them, kept so that moves are drawn in constant time
+        self.unknown = CellPool(height, width, full=True)
+        self.pending = CellPool(height, width)
 
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
+        if cell in self.mines:
+            return
         self.mines.add(cell)
-        self.moves_made.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self.unknown.discard(cell)
+        for number in self.containing.pop(cell, ()):
+            self.update(number, lambda sentence: sentence.mark_mine(cell))
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
         """
+        if cell in self.safes:
+            return
         self.safes.add(cell)
-        self.moves_made.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        if cell in self.unknown:
+            self.pending.add(cell)
+        for number in self.containing.pop(cell, ()):
+            self.update(number, lambda sentence: sentence.mark_safe(cell))
+
+    def update(self, number, change):
+        """
+        Replaces a sentence in the knowledge base by `change` applied to
+        it, and queues it for inference. A sentence left with no cells,
+        or identical to another one, is dropped.
+        """
+        sentence = self.knowledge[number]
+        del self.numbers[sentence]
+        sentence = change(sentence)
+        self.knowledge[number] = sentence
+        if not sentence.size() or sentence in self.numbers:
+            self.remove_sentence(number)
+        else:
+            self.numbers[sentence] = number
+            self.dirty.add(number)
+
+    def add_sentence(self, cells, count):
+        """
+        Adds a sentence that `count` of `cells` are mines, leaving out
+        cells already known to be mines or safe, unless the knowledge
+        base already holds it. The sentence is queued for inference.
+        """
+        cells = set(cells)
+        count -= len(cells & self.mines)
+        cells -= self.mines
+        cells -= self.safes
+        if cells:
+            self.store(Sentence(cells, count))
+
+    def store(self, sentence):
+        """
+        Numbers and indexes a new sentence, unless the knowledge base
+        already holds an identical one, and queues it for inference.
+        """
+        if sentence in self.numbers:
+            return
+
+        number = self.next_number
+        self.next_number += 1
+        self.stats.sentences_created += 1
+        self.knowledge[number] = sentence
+        self.numbers[sentence] = number
+        for cell in sentence.cells:
+            self.containing.setdefault(cell, set()).add(number)
+        self.dirty.add(number)
+
+    def remove_sentence(self, number):
+        """Removes a sentence from the knowledge base and its indexes."""
+        sentence = self.knowledge.pop(number)
+        self.stats.sentences_pruned += 1
+        if self.numbers.get(sentence) == number:
+            del self.numbers[sentence]
+        for cell in sentence.cells:
+            self.containing[cell].discard(number)
+        self.dirty.discard(number)
+
+    def infer(self):
+        """
+        Draws inferences from changed sentences until nothing changes.
+        A sentence whose count is zero marks its cells safe, and one
+        whose count equals its number of cells marks them mines; either
+        way it is then removed. Otherwise, for each sentence sharing a
+        cell with it that is a subset or superset of it, the difference
+        of the two is added as a new sentence, and the superset, which
+        the subset and the difference imply, is removed. Marking a cell
+        only queues the sentences that contain it, so each inference
+        touches a bounded neighborhood of the board.
+        """
+        rounds = subset_checks = 0
+        while self.dirty:
+            number = self.dirty.pop()
+            sentence = self.knowledge[number]
+            rounds += 1
+
+            if sentence.count == 0 or sentence.count == len(sentence.cells):
+                cells = list(sentence.cells)
+                mines = sentence.count > 0
+                self.remove_sentence(number)
+                for cell in cells:
+                    if mines:
+                        self.mark_mine(cell)
+                    else:
+                        self.mark_safe(cell)
+                continue
+
+            # Only sentences sharing a cell can be subsets or supersets
+            related = set()
+            for cell in sentence.cells:
+                related |= self.containing[cell]
+            related.discard(number)
+            subset_checks += len(related)
+            for other_number in related:
+                other = self.knowledge.get(other_number)
+                if other is None:
+                    continue
+                if sentence.cells < other.cells:
+                    self.add_sentence(other.cells - sentence.cells,
+                                      other.count - sentence.count)
+                    self.remove_sentence(other_number)
+                elif other.cells < sentence.cells:
+                    self.add_sentence(sentence.cells - other.cells,
+                                      sentence.count - other.count)
+                    self.remove_sentence(number)
+                    break
+
+        self.stats.rounds += rounds
+        self.stats.subset_checks += subset_checks
+
+    def propagate(self):
+        """
+        Draws inferences from the sentences that changed, and, once no
+        safe move is left, the deductions that need the whole frontier.
+        """
+        self.infer()
+        while not self.pending and self.reduce_frontier():
+            self.infer()
 
     def add_knowledge(self, cell, count):
         """
@@ -193,9 +359,13 @@ class MinesweeperAI():
             5) add any new sentences to the AI's knowledge base
                if they can be inferred from existing knowledge
         """
+        start = time.perf_counter()
 
-        self.safes.add(cell)
         self.moves_made.add(cell)
+        self.unknown.discard(cell)
+        self.pending.discard(cell)
+        self.mark_safe(cell)
+
         cells = []
         for x in range(cell[0] - 1, cell[0] + 2):
             for y in range(cell[1] - 1, cell[1] + 2):
@@ -203,54 +373,12 @@ class MinesweeperAI():
                     new_instance = (x, y)
                     if (new_instance != cell):
                         cells.append(new_instance)
-        self.knowledge.add(Sentence(cells, count))
-        # adds the safe cell to the data structure
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
-        """ 
-        infer from one sentence count equalling the length of that 
-        sentences count that all of the cells are mines and then apply 
-        that knowledge to all sentences
-        """
-        for sentence in self.knowledge:
-            if (sentence.count == len(sentence.cells)):
-                for cell in sentence.cells:
-                    self.mines.add(cell)
-
-        for mine in self.mines:
-            for sentence in self.knowledge:
-                sentence.mark_mine(mine)
-        """
-        infer from one sentence count being zero but there being cells
-        that all those cells are safe and then propigate that knowledge
-        to current sentence and that particular cell knowledge to the
-        rest of the sentences
-        """
-        for sentence in self.knowledge:
-            if (sentence.count == 0 and len(sentence.cells) != 0):
-                for cell in sentence.cells:
-                    self.safes.add(cell)
-
-        for safe_cell in self.safes:
-            for sentence in self.knowledge:
-                sentence.mark_safe(safe_cell)
-
-        """
-        Add the difference between two complete subsets to knowledge
-        """
-        sentences = []
-        for first in self.knowledge:
-            for second in self.knowledge:
-                if (first != second and first.cells.issubset(second.cells)):
-                    count_new = second.count - first.count
-                    new_set = second.cells.difference(first.cells)
-                    sentences.append(Sentence(new_set, count_new))
-        [self.knowledge.add(sentence) for sentence in sentences]
-
-        for sentence in self.knowledge:
-             print(sentence.cells, sentence.count)
-        print(f"safes: {self.safes}")
-        print(f"moves_made: {self.moves_made}")
+        self.add_sentence(cells, count)
+
+        # Inferences only start from the sentences that changed
+        self.propagate()
+        self.stats.add_move(cell, count, len(self.knowledge),
+                            time.perf_counter() - start)
 
     def make_safe_move(self):
         """
@@ -260,8 +388,7 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        difference = self.safes.difference(self.moves_made)
-        return None if not difference else random.choice(tuple(difference))
+        return self.pending.sample()
 
     def make_random_move(self):
         """
@@ -269,13 +396,507 @@ class MinesweeperAI():
         Should choose randomly among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+        Among those, only the cells least likely to be mines (see
+        `mine_probabilities`) are chosen from, and of those the ones with
+        the fewest unknown neighbors, which are the likeliest to reveal
+        a zero.
         """
-        move_availability = set()
-        moves = self.moves_made.union(self.mines)
-        for x in range(self.height):
-            for y in range(self.width):
-                sets = (x, y)
-                if (sets not in moves):
-                    move_availability.add(sets)
+        start = time.perf_counter()
+        probabilities, rest, unconstrained = self.guess_probabilities()
+        if not probabilities and not unconstrained:
+            return None
+        lowest = min(probabilities.values(), default=rest)
+        if unconstrained:
+            lowest = min(lowest, rest)
+        move_availability = [
+            cell for cell, probability in probabilities.items()
+            if probability <= lowest + 1e-9
+        ]
+        if unconstrained and rest <= lowest + 1e-9:
+            move_availability.extend(self.unconstrained_cells(probabilities))
+
+        def unknown_neighbors(cell):
+            return sum(
+                1 for x in range(cell[0] - 1, cell[0] + 2)
+                for y in range(cell[1] - 1, cell[1] + 2)
+                if (x, y) in self.unknown and (x, y) != cell
+            )
+
+        fewest = min(unknown_neighbors(cell) for cell in move_availability)
+        move_availability = [
+            cell for cell in move_availability
+            if unknown_neighbors(cell) == fewest
+        ]
+        self.stats.guesses += 1
+        self.stats.guess_time += time.perf_counter() - start
+        return random.choice(move_availability)
+
+    def unconstrained_cells(self, probabilities):
+        """
+        Returns unknown cells off the frontier (those not in
+        `probabilities`): all of them on small boards, and otherwise the
+        corners and a random sample of the rest, or all of them if the
+        sample holds none. Some are returned whenever any exists.
+        """
+        if len(self.unknown) <= MinesweeperAI.SCAN_LIMIT:
+            return [cell for cell in self.unknown if cell not in probabilities]
+
+        corners = [(0, 0), (0, self.width - 1),
+                   (self.height - 1, 0), (self.height - 1, self.width - 1)]
+        cells = {
+            cell for cell in corners
+            if cell in self.unknown and cell not in probabilities
+        }
+        for _ in range(MinesweeperAI.SAMPLE_SIZE):
+            cell = self.unknown.sample()
+            if cell not in probabilities:
+                cells.add(cell)
+
+        # Late in a game nearly every unknown cell can be on the frontier,
+        # and the sample miss the few that are not, so they are then
+        # looked for among all unknown cells
+        if not cells:
+            return [cell for cell in self.unknown if cell not in probabilities]
+        return list(cells)
+
+    def mine_probabilities(self):
+        """
+        Returns the probability that each cell that has not been chosen
+        and is not known to be a mine is a mine, given the knowledge base
+        and the number of mines on the board (see `guess_probabilities`).
+        """
+        probabilities, rest, _ = self.guess_probabilities()
+        for cell in self.unknown:
+            if cell not in probabilities:
+                probabilities[cell] = rest
+        return probabilities
+
+    def guess_probabilities(self):
+        """
+        Returns the probability that each known safe cell not yet chosen
+        and each frontier cell (one in some sentence) is a mine, the
+        probability shared by every other unknown cell, and the number of
+        those cells.
+
+        The frontier is split into components of cells linked by
+        sentences. Each component's solutions are counted by the number
+        of mines they place, and every combination of components is
+        weighted by the ways of placing the remaining mines among the
+        unconstrained cells. Components too large to enumerate get a
+        local estimate instead.
+        """
+        probabilities = dict()
+        for cell in self.pending:
+            probabilities[cell] = 0.0
+
+        remaining = self.mine_count - self.known_mine_count()
+        components = []
+        for cells, sentences in self.frontier_components():
+            if len(cells) > MinesweeperAI.COMPONENT_LIMIT:
+                estimates = self.estimate_component(cells, sentences)
+                probabilities.update(estimates)
+                remaining -= round(sum(estimates.values()))
+            else:
+                components.append((cells, self.count_component(cells, sentences)))
+        unconstrained = len(self.unknown) - len(probabilities) - sum(
+            len(cells) for cells, _ in components
+        )
+
+        # Mine-count distributions of the other components, for each one
+        others = [{0: 1}]
+        for _, (ways, _) in components[:-1]:
+            others.append(convolve(others[-1], ways))
+        suffix = {0: 1}
+        for i in range(len(components) - 1, -1, -1):
+            others[i] = convolve(others[i], suffix)
+            suffix = convolve(suffix, components[i][1][0])
+        total = suffix
+
+        # Ways of placing the remaining mines off the frontier, relative
+        # to the most numerous, in log space since the binomial
+        # coefficients of large boards are enormous
+        def log_ways(mines):
+            rest = remaining - mines
+            if not 0 <= rest <= unconstrained:
+                return None
+            return (math.lgamma(unconstrained + 1) - math.lgamma(rest + 1)
+                    - math.lgamma(unconstrained - rest + 1))
+
+        logs = {k: log_ways(k) for k in range(max(total) + 1)}
+        top = max((log for log in logs.values() if log is not None),
+                  default=0.0)
+        weights = {
+            k: 0.0 if log is None else math.exp(log - top)
+            for k, log in logs.items()
+        }
+
+        # Inconsistent counts (such as a wrong number of mines) fall back
+        # to weighting every solution of the frontier equally
+        normalizer = sum(w * weights[k] for k, w in total.items())
+        if normalizer == 0:
+            weights = dict.fromkeys(weights, 1.0)
+            normalizer = sum(total.values())
+
+        for (cells, (ways, mines_by_count)), other in zip(components, others):
+            factors = {
+                k: sum(w * weights[k + j] for j, w in other.items())
+                for k in ways
+            }
+            for i, cell in enumerate(cells):
+                probabilities[cell] = sum(
+                    mines_by_count[k][i] * factor
+                    for k, factor in factors.items()
+                ) / normalizer
+
+        rest = 0.0
+        if unconstrained:
+            expected = sum(
+                w * weights[k] * max(remaining - k, 0)
+                for k, w in total.items()
+            ) / normalizer
+            rest = min(1.0, expected / unconstrained)
+        return probabilities, rest, unconstrained
+
+    def known_mine_count(self):
+        """Returns the number of cells known to be mines."""
+        return len(self.mines)
+
+    def reduce_frontier(self):
+        """
+        Marks the cells that the sentences of the frontier determine
+        together, though no pair of them does, by `eliminate` on each
+        component of the frontier. When every unknown cell is on the
+        frontier, the number of mines left is one more sentence, over
+        all of them. Returns whether any cell was marked.
+        """
+        start = time.perf_counter()
+        components = self.frontier_components()
+        frontier = [cell for cells, _ in components for cell in cells]
+        if components and len(frontier) == len(self.unknown) - len(self.pending):
+            sentences = [
+                sentence for _, sentences in components
+                for sentence in sentences
+            ]
+            sentences.append(
+                (frontier, self.mine_count - self.known_mine_count())
+            )
+            components = [(frontier, sentences)]
+
+        determined = dict()
+        for cells, sentences in components:
+            if len(sentences) > 1:
+                determined.update(eliminate(cells, sentences))
+        self.stats.eliminations += 1
+        self.stats.cells_eliminated += len(determined)
+        self.stats.elimination_time += time.perf_counter() - start
+        for cell, mine in determined.items():
+            if mine:
+                self.mark_mine(cell)
+            else:
+                self.mark_safe(cell)
+        return bool(determined)
+
+    def frontier_components(self):
+        """
+        Returns the components of the frontier: lists of cells linked by
+        the sentences that mention them, in breadth-first order, each
+        with the (cells, count) of its sentences.
+        """
+        components = []
+        seen = set()
+        for start in self.containing:
+            if start in seen or not self.containing[start]:
+                continue
+            seen.add(start)
+            cells = [start]
+            numbers = set()
+            for cell in cells:
+                for number in self.containing[cell]:
+                    if number in numbers:
+                        continue
+                    numbers.add(number)
+                    for other in sorted(self.knowledge[number].cells):
+                        if other not in seen:
+                            seen.add(other)
+                            cells.append(other)
+            sentences = [
+                (self.knowledge[number].cells, self.knowledge[number].count)
+                for number in sorted(numbers)
+            ]
+            components.append((cells, sentences))
+        return components
+
+    def count_component(self, cells, sentences):
+        """
+        Counts the solutions of a component's sentences, by backtracking
+        over its cells in order. Returns a dict from number of mines to
+        number of solutions, and a dict from number of mines to the
+        number of those solutions that make each cell (in order) a mine.
+
+        The solutions for the cells from one onwards only depend on the
+        remaining counts of the sentences that span it, so they are
+        memoized on those.
+        """
+        n = len(cells)
+        position = {cell: i for i, cell in enumerate(cells)}
+        spans = []
+        for sentence_cells, _ in sentences:
+            indices = [position[cell] for cell in sentence_cells]
+            spans.append((min(indices), max(indices)))
+        open_at = [
+            [s for s, (first, last) in enumerate(spans) if first < i <= last]
+            for i in range(n + 1)
+        ]
+        at = [[] for _ in range(n)]
+        for s, (sentence_cells, _) in enumerate(sentences):
+            for cell in sentence_cells:
+                at[position[cell]].append(s)
+
+        # Cells of each sentence still unassigned after each position
+        after = [[0] * n for _ in sentences]
+        for s, (sentence_cells, _) in enumerate(sentences):
+            for cell in sentence_cells:
+                for i in range(position[cell]):
+                    after[s][i] += 1
+
+        memo = dict()
+
+        def solve(i, counts):
+            if i == n:
+                return {0: (1, [])}
+            key = (i, tuple(counts[s] for s in open_at[i]))
+            if key in memo:
+                return memo[key]
+
+            result = dict()
+            for mine in (0, 1):
+                changed = list(counts)
+                feasible = True
+                for s in at[i]:
+                    changed[s] -= mine
+                    if not 0 <= changed[s] <= after[s][i]:
+                        feasible = False
+                        break
+                if not feasible:
+                    continue
+                for k, (ways, mines) in solve(i + 1, changed).items():
+                    k += mine
+                    if k not in result:
+                        result[k] = (0, [0] * (n - i))
+                    total, counts_here = result[k]
+                    counts_here[0] += ways * mine
+                    for j, count in enumerate(mines, 1):
+                        counts_here[j] += count
+                    result[k] = (total + ways, counts_here)
+            memo[key] = result
+            return result
+
+        solutions = solve(0, [count for _, count in sentences])
+        ways = {k: total for k, (total, _) in solutions.items()}
+        mines = {k: counts for k, (_, counts) in solutions.items()}
+        return ways, mines
+
+    def estimate_component(self, cells, sentences):
+        """
+        Estimates the mine probabilities of a component too large to
+        enumerate: each cell takes the highest mine density among the
+        sentences that mention it.
+        """
+        estimates = dict.fromkeys(cells, 0.0)
+        for sentence_cells, count in sentences:
+            density = count / len(sentence_cells)
+            for cell in sentence_cells:
+                estimates[cell] = max(estimates[cell], density)
+        return estimates
+
+
+def eliminate(cells, sentences):
+    """
+    Returns the cells of a system of sentences, each (cells, count), that
+    the system determines, as a dict from cell to whether it is a mine.
+
+    Each sentence is a linear equation over 0/1 variables, one per cell.
+    The equations are brought to reduced row echelon form by Gaussian
+    elimination over the integers: rows are scaled rather than divided,
+    so coefficients stay exact. Every reduced row then bounds its sum by
+    its negative and positive coefficients: a cell whose value would put
+    the row's count out of reach is determined. An inconsistent system
+    determines nothing.
+    """
+    index = {cell: i for i, cell in enumerate(cells)}
+    rows = [
+        ({index[cell]: 1 for cell in sentence_cells}, count)
+        for sentence_cells, count in sentences
+    ]
+    holders = dict()
+    for number, (row, _) in enumerate(rows):
+        for column in row:
+            holders.setdefault(column, set()).add(number)
+
+    pivots = set()
+    for column in range(len(cells)):
+        candidates = holders.get(column, set()) - pivots
+        if not candidates:
+            continue
+        pivot = min(candidates, key=lambda number: len(rows[number][0]))
+        pivots.add(pivot)
+        pivot_row, pivot_count = rows[pivot]
+        a = pivot_row[column]
+        for number in holders[column] - {pivot}:
+            row, count = rows[number]
+            b = row[column]
+            reduced = {c: a * value for c, value in row.items()}
+            for c, value in pivot_row.items():
+                reduced[c] = reduced.get(c, 0) - b * value
+            reduced = {c: value for c, value in reduced.items() if value}
+            count = a * count - b * pivot_count
+            divisor = math.gcd(count, *reduced.values())
+            if divisor > 1:
+                reduced = {c: value // divisor for c, value in reduced.items()}
+                count //= divisor
+            for c in row.keys() - reduced.keys():
+                holders[c].discard(number)
+            for c in reduced.keys() - row.keys():
+                holders.setdefault(c, set()).add(number)
+            rows[number] = (reduced, count)
+
+    determined = dict()
+    for row, count in rows:
+        low = sum(value for value in row.values() if value < 0)
+        high = sum(value for value in row.values() if value > 0)
+        if not low <= count <= high:
+            return dict()
+        for column, value in row.items():
+            # The least and greatest sums with this cell a mine, and with
+            # it safe
+            if value > 0:
+                mine = (low + value, high)
+                safe = (low, high - value)
+            else:
+                mine = (low, high + value)
+                safe = (low - value, high)
+            if not mine[0] <= count <= mine[1]:
+                mine = False
+            elif not safe[0] <= count <= safe[1]:
+                mine = True
+            else:
+                continue
+            if determined.setdefault(cells[column], mine) != mine:
+                return dict()
+    return determined
+
+
+def convolve(first, second):
+    """
+    Returns the distribution of the total of two independent counts,
+    each given as a dict from count to number of ways.
+    """
+    result = dict()
+    for i, a in first.items():
+        for j, b in second.items():
+            result[i + j] = result.get(i + j, 0) + a * b
+    return result
+
+
+class CellPool():
+    """
+    Set of cells of a board that a cell can be drawn from at random in
+    constant time. Cell (i, j) is numbered i * width + j. The numbers in
+    the pool fill the front of one array, and the position of every
+    number in that array is kept in another, so adding or removing a
+    cell swaps two entries.
+    """
+
+    def __init__(self, height, width, full=False):
+        self.height = height
+        self.width = width
+        self.cells = array("i", range(height * width))
+        self.positions = array("i", range(height * width))
+        self.size = height * width if full else 0
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, cell):
+        i, j = cell
+        if not (0 <= i < self.height and 0 <= j < self.width):
+            return False
+        return self.positions[i * self.width + j] < self.size
+
+    def __iter__(self):
+        for k in range(self.size):
+            yield divmod(self.cells[k], self.width)
+
+    def move(self, number, position):
+        """Swaps a cell number with the one at `position`."""
+        other = self.cells[position]
+        current = self.positions[number]
+        self.cells[position], self.cells[current] = number, other
+        self.positions[number], self.positions[other] = position, current
+
+    def add(self, cell):
+        number = cell[0] * self.width + cell[1]
+        if self.positions[number] >= self.size:
+            self.move(number, self.size)
+            self.size += 1
+
+    def discard(self, cell):
+        number = cell[0] * self.width + cell[1]
+        if self.positions[number] < self.size:
+            self.size -= 1
+            self.move(number, self.size)
+
+    def sample(self):
+        """Returns a random cell of the pool, or None if it is empty."""
+        if not self.size:
+            return None
+        return divmod(self.cells[random.randrange(self.size)], self.width)
+
+
+class Stats():
+    """
+    Counters and timers of the work of a MinesweeperAI:
+        - moves whose knowledge was added, and the time spent adding it
+        - rounds of inference (sentences taken off the worklist) and
+          pairs of sentences checked for subsets
+        - sentences created and pruned, and the most ever known
+        - passes of elimination over the frontier, the time they took
+          and the cells they determined
+        - random guesses, and the time spent choosing them
+    Counting costs a few additions per move. If `trace` is a file, each
+    move also writes a JSON line of the cell, its count, the sentences
+    known after it, the time spent on it, and the counters so far.
+    """
 
-        return None if move_availability == set() else random.choice(tuple(move_availability))
\ No newline at end of file
+    def __init__(self, trace=None):
+        self.moves = 0
+        self.inference_time = 0.0
+        self.rounds = 0
+        self.subset_checks = 0
+        self.sentences_created = 0
+        self.sentences_pruned = 0
+        self.max_knowledge = 0
+        self.eliminations = 0
+        self.cells_eliminated = 0
+        self.elimination_time = 0.0
+        self.guesses = 0
+        self.guess_time = 0.0
+        self.trace = trace
+
+    def counters(self):
+        """Returns a dict of the counters and timers."""
+        return {
+            name: value for name, value in vars(self).items()
+            if name != "trace"
+        }
+
+    def add_move(self, cell, count, knowledge, seconds):
+        """Counts a move whose knowledge took `seconds` to add."""
+        self.moves += 1
+        self.inference_time += seconds
+        self.max_knowledge = max(self.max_knowledge, knowledge)
+        if self.trace is not None:
+            self.trace.write(json.dumps({
+                "cell": cell, "count": count, "knowledge": knowledge,
+                "seconds": seconds, **self.counters()
+            }) + "\n")
@@ -0,0 +1,180 @@
+import random
+import struct
+import sys
+import time
+from array import array
+
+from minesweeper import Minesweeper, MinesweeperAI
+from bitboard import BitboardAI
+from board import Board
+from simulate import parse_config, play
+
+
+# A record is a header, the cell number (i * width + j) of every mine,
+# and one entry per move: its cell number, the number of mines next to
+# it (or MINE if it was one) with GUESSED set for a random guess, and the
+# microseconds spent adding its knowledge
+MAGIC = b"MSWR"
+HEADER = struct.Struct("<4sBHHIQI")
+MOVE = struct.Struct("<IBI")
+MINE = 0x7F
+GUESSED = 0x80
+
+# Flags of the header
+BITBOARD = 1
+NUMPY = 2
+
+
+def record_game(height, width, mines, seed, bitboard=False, numpy=False):
+    """
+    Plays one game as `simulate.play` does, and returns its record: a
+    dict of the board's size and mines, the seed, which AI and board
+    played it, the mine layout and the moves.
+    """
+    record = {
+        "height": height, "width": width, "mines": mines, "seed": seed,
+        "bitboard": bitboard, "numpy": numpy
+    }
+    play(height, width, mines, seed, bitboard, numpy, record=record)
+    return record
+
+
+def write_record(record, filename):
+    """Writes a game record to a file in the binary record format."""
+    width = record["width"]
+    flags = ((BITBOARD if record["bitboard"] else 0)
+             | (NUMPY if record["numpy"] else 0))
+    with open(filename, "wb") as f:
+        f.write(HEADER.pack(
+            MAGIC, flags, record["height"], width, record["mines"],
+            record["seed"], len(record["moves"])
+        ))
+        f.write(array("I", [i * width + j for i, j in record["layout"]]).tobytes())
+        for (i, j), count, guessed, seconds in record["moves"]:
+            f.write(MOVE.pack(
+                i * width + j,
+                (MINE if count is None else count) | (GUESSED if guessed else 0),
+                min(round(seconds * 1e6), 0xFFFFFFFF)
+            ))
+
+
+def read_record(filename):
+    """Reads a game record written by `write_record`."""
+    with open(filename, "rb") as f:
+        data = f.read()
+    magic, flags, height, width, mines, seed, count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{filename}: not a minesweeper game record")
+
+    offset = HEADER.size
+    layout = array("I")
+    layout.frombytes(data[offset:offset + mines * layout.itemsize])
+    offset += mines * layout.itemsize
+
+    moves = []
+    entries = data[offset:offset + count * MOVE.size]
+    for number, value, micros in MOVE.iter_unpack(entries):
+        nearby = value & ~GUESSED
+        moves.append((
+            divmod(number, width), None if nearby == MINE else nearby,
+            bool(value & GUESSED), micros / 1e6
+        ))
+    return {
+        "height": height, "width": width, "mines": mines, "seed": seed,
+        "bitboard": bool(flags & BITBOARD), "numpy": bool(flags & NUMPY),
+        "layout": [divmod(number, width) for number in layout],
+        "moves": moves
+    }
+
+
+def replay(record, trace=None):
+    """
+    Re-drives the AI of a recorded game through its moves, without a
+    board, the random module seeded as when it was recorded. Returns the
+    time spent adding each move's knowledge, which stops short of the
+    record if the AI chooses a different move, or None if the seed no
+    longer lays out the recorded mines. If `trace` is a file, the AI
+    writes its `Stats` trace to it.
+    """
+    height, width, mines = record["height"], record["width"], record["mines"]
+    random.seed(record["seed"])
+    game = (Board if record["numpy"] else Minesweeper)(
+        height=height, width=width, mines=mines
+    )
+    if sorted(game.mines) != record["layout"]:
+        return None
+    ai = (BitboardAI if record["bitboard"] else MinesweeperAI)(
+        height=height, width=width, mines=mines, trace=trace
+    )
+
+    timings = []
+    for cell, count, _, _ in record["moves"]:
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+        if move != cell or count is None:
+            break
+        start = time.perf_counter()
+        ai.add_knowledge(cell, count)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    # Options are separated from the positional arguments
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    options = dict(
+        arg[2:].partition("=")[::2] for arg in sys.argv[1:]
+        if arg.startswith("--")
+    )
+    usage = "Incorrect command!!! Must enter in following format -> python replay.py HxW:MINES --record=FILE [--seed=N] [--bitboard] [--numpy], or python replay.py FILE [--top=N] [--trace=FILE]"
+    if len(args) != 1:
+        sys.exit(usage)
+
+    if options.get("record"):
+        try:
+            height, width, mines = parse_config(args[0])
+        except ValueError:
+            sys.exit(usage)
+        record = record_game(
+            height, width, mines, int(options.get("seed") or 0),
+            "bitboard" in options, "numpy" in options
+        )
+        write_record(record, options["record"])
+        lost = record["moves"] and record["moves"][-1][1] is None
+        print(f"Recorded {len(record['moves'])} moves "
+              f"({'lost' if lost else 'won'}) to {options['record']}")
+        return
+
+    record = read_record(args[0])
+    print(f"{record['height']}x{record['width']} with {record['mines']} mines, "
+          f"seed {record['seed']}, "
+          f"{'BitboardAI' if record['bitboard'] else 'MinesweeperAI'} on "
+          f"{'Board' if record['numpy'] else 'Minesweeper'}")
+    if options.get("trace"):
+        with open(options["trace"], "w") as trace:
+            timings = replay(record, trace)
+    else:
+        timings = replay(record)
+    if timings is None:
+        sys.exit("The seed no longer lays out the recorded mines")
+
+    # The last move of a lost game adds no knowledge
+    moves = record["moves"]
+    expected = len(moves) - (1 if moves and moves[-1][1] is None else 0)
+    if len(timings) < expected:
+        print(f"Replay diverged from the record at move {len(timings) + 1}")
+    recorded = sum(seconds for _, _, _, seconds in moves[:len(timings)])
+    print(f"{len(timings)} moves replayed: {1e3 * sum(timings):.1f}ms "
+          f"of inference, {1e3 * recorded:.1f}ms recorded")
+
+    top = int(options.get("top") or 5)
+    slowest = sorted(range(len(timings)), key=lambda k: -timings[k])[:top]
+    for k in slowest:
+        cell, count, guessed, seconds = moves[k]
+        print(f"move {k + 1} {cell} = {count}{' (guess)' if guessed else ''}: "
+              f"{1e3 * timings[k]:.2f}ms, {1e3 * seconds:.2f}ms recorded")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import pygame
+import queue
 import sys
-import time
+import threading
 
 from minesweeper import Minesweeper, MinesweeperAI
 
@@ -9,6 +10,9 @@ HEIGHT = 8
 WIDTH = 8
 MINES = 8
 
+# Frames drawn per second, at most
+FPS = 30
+
 # Colors
 BLACK = (0, 0, 0)
 GRAY = (180, 180, 180)
@@ -38,186 +42,249 @@ flag = pygame.transform.scale(flag, (cell_size, cell_size))
 mine = pygame.image.load("assets/images/mine.png")
 mine = pygame.transform.scale(mine, (cell_size, cell_size))
 
+# Numbers of nearby mines are rendered once, not every frame
+numbers = [smallFont.render(str(n), True, BLACK) for n in range(9)]
+
+# Buttons and the text showing if the game was won or lost
+playButton = pygame.Rect((width / 4), (3 / 4) * height, width / 2, 50)
+aiButton = pygame.Rect(
+    (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 50,
+    (width / 3) - BOARD_PADDING * 2, 50
+)
+resetButton = pygame.Rect(
+    (2 / 3) * width + BOARD_PADDING, (1 / 3) * height + 20,
+    (width / 3) - BOARD_PADDING * 2, 50
+)
+statusRect = pygame.Rect(
+    (2 / 3) * width + BOARD_PADDING, (2 / 3) * height - 25,
+    (width / 3) - BOARD_PADDING * 2, 50
+)
+
+
+def ai_worker(jobs, results):
+    """
+    Runs the AI off the UI thread, so the window stays responsive while
+    it draws inferences. Each job is an AI and either a (cell, count)
+    to add to its knowledge or None to ask it for a move. Moves are put
+    on `results` as (ai, move, safe, mines): the AI that chose the move,
+    so that results of an AI since reset are dropped, whether the move
+    is known to be safe, and the mines it knows of if it has no move.
+    """
+    while True:
+        ai, knowledge = jobs.get()
+        if knowledge is not None:
+            ai.add_knowledge(*knowledge)
+            continue
+        move = ai.make_safe_move()
+        safe = move is not None
+        if not safe:
+            move = ai.make_random_move()
+        results.put((ai, move, safe, set(ai.mines) if move is None else None))
+
+
+def cell_at(position):
+    """Returns the cell of the board at a position, or None."""
+    j = (position[0] - board_origin[0]) // cell_size
+    i = (position[1] - board_origin[1]) // cell_size
+    if 0 <= i < HEIGHT and 0 <= j < WIDTH:
+        return (i, j)
+    return None
+
+
+def draw_cell(cell):
+    """Draws a cell of the board, and returns its rectangle."""
+    i, j = cell
+    rect = pygame.Rect(
+        board_origin[0] + j * cell_size,
+        board_origin[1] + i * cell_size,
+        cell_size, cell_size
+    )
+    pygame.draw.rect(screen, GRAY, rect)
+    pygame.draw.rect(screen, WHITE, rect, 3)
+
+    # Add a mine, flag, or number if needed
+    if lost and game.is_mine(cell):
+        screen.blit(mine, rect)
+    elif cell in flags:
+        screen.blit(flag, rect)
+    elif cell in revealed:
+        neighbors = numbers[game.nearby_mines(cell)]
+        neighborsTextRect = neighbors.get_rect()
+        neighborsTextRect.center = rect.center
+        screen.blit(neighbors, neighborsTextRect)
+    return rect
+
+
+def draw_button(rect, label):
+    pygame.draw.rect(screen, WHITE, rect)
+    buttonText = mediumFont.render(label, True, BLACK)
+    buttonRect = buttonText.get_rect()
+    buttonRect.center = rect.center
+    screen.blit(buttonText, buttonRect)
+
+
+# Inference runs on a worker thread, fed by a queue of jobs
+jobs = queue.Queue()
+results = queue.Queue()
+threading.Thread(target=ai_worker, args=(jobs, results), daemon=True).start()
+clock = pygame.time.Clock()
+
 # Create game and AI agent
 game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mines=MINES)
 
-# Keep track of revealed cells, flagged cells, and if a mine was hit
+# Keep track of revealed cells, flagged cells, if a mine was hit, and if
+# the AI has been asked for a move it has not made yet
 revealed = set()
 flags = set()
 lost = False
+thinking = False
 
 # Show instructions initially
 instructions = True
 
+# Only cells that changed are repainted, unless the whole screen must be
+redraw = True
+changed = set()
+status = None
+
 while True:
+    clock.tick(FPS)
 
-    # Check if game quit
+    # Check if game quit, and collect clicks
+    clicks = []
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             sys.exit()
-
-    screen.fill(BLACK)
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button in (1, 3):
+            clicks.append(event)
 
     # Show game instructions
     if instructions:
-
-        # Title
-        title = largeFont.render("Play Minesweeper", True, WHITE)
-        titleRect = title.get_rect()
-        titleRect.center = ((width / 2), 50)
-        screen.blit(title, titleRect)
-
-        # Rules
-        rules = [
-            "Click a cell to reveal it.",
-            "Right-click a cell to mark it as a mine.",
-            "Mark all mines successfully to win!"
-        ]
-        for i, rule in enumerate(rules):
-            line = smallFont.render(rule, True, WHITE)
-            lineRect = line.get_rect()
-            lineRect.center = ((width / 2), 150 + 30 * i)
-            screen.blit(line, lineRect)
-
-        # Play game button
-        buttonRect = pygame.Rect((width / 4), (3 / 4) * height, width / 2, 50)
-        buttonText = mediumFont.render("Play Game", True, BLACK)
-        buttonTextRect = buttonText.get_rect()
-        buttonTextRect.center = buttonRect.center
-        pygame.draw.rect(screen, WHITE, buttonRect)
-        screen.blit(buttonText, buttonTextRect)
+        if redraw:
+            screen.fill(BLACK)
+
+            # Title
+            title = largeFont.render("Play Minesweeper", True, WHITE)
+            titleRect = title.get_rect()
+            titleRect.center = ((width / 2), 50)
+            screen.blit(title, titleRect)
+
+            # Rules
+            rules = [
+                "Click a cell to reveal it.",
+                "Right-click a cell to mark it as a mine.",
+                "Mark all mines successfully to win!"
+            ]
+            for i, rule in enumerate(rules):
+                line = smallFont.render(rule, True, WHITE)
+                lineRect = line.get_rect()
+                lineRect.center = ((width / 2), 150 + 30 * i)
+                screen.blit(line, lineRect)
+
+            # Play game button
+            draw_button(playButton, "Play Game")
+            pygame.display.flip()
+            redraw = False
 
         # Check if play button clicked
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1:
-            mouse = pygame.mouse.get_pos()
-            if buttonRect.collidepoint(mouse):
+        for click in clicks:
+            if click.button == 1 and playButton.collidepoint(click.pos):
                 instructions = False
-                time.sleep(0.3)
-
-        pygame.display.flip()
+                redraw = True
         continue
 
-    # Draw board
-    cells = []
-    for i in range(HEIGHT):
-        row = []
-        for j in range(WIDTH):
-
-            # Draw rectangle for cell
-            rect = pygame.Rect(
-                board_origin[0] + j * cell_size,
-                board_origin[1] + i * cell_size,
-                cell_size, cell_size
-            )
-            pygame.draw.rect(screen, GRAY, rect)
-            pygame.draw.rect(screen, WHITE, rect, 3)
-
-            # Add a mine, flag, or number if needed
-            if game.is_mine((i, j)) and lost:
-                screen.blit(mine, rect)
-            elif (i, j) in flags:
-                screen.blit(flag, rect)
-            elif (i, j) in revealed:
-                neighbors = smallFont.render(
-                    str(game.nearby_mines((i, j))),
-                    True, BLACK
-                )
-                neighborsTextRect = neighbors.get_rect()
-                neighborsTextRect.center = rect.center
-                screen.blit(neighbors, neighborsTextRect)
-
-            row.append(rect)
-        cells.append(row)
-
-    # AI Move button
-    aiButton = pygame.Rect(
-        (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 50,
-        (width / 3) - BOARD_PADDING * 2, 50
-    )
-    buttonText = mediumFont.render("AI Move", True, BLACK)
-    buttonRect = buttonText.get_rect()
-    buttonRect.center = aiButton.center
-    pygame.draw.rect(screen, WHITE, aiButton)
-    screen.blit(buttonText, buttonRect)
-
-    # Reset button
-    resetButton = pygame.Rect(
-        (2 / 3) * width + BOARD_PADDING, (1 / 3) * height + 20,
-        (width / 3) - BOARD_PADDING * 2, 50
-    )
-    buttonText = mediumFont.render("Reset", True, BLACK)
-    buttonRect = buttonText.get_rect()
-    buttonRect.center = resetButton.center
-    pygame.draw.rect(screen, WHITE, resetButton)
-    screen.blit(buttonText, buttonRect)
+    moves = []
 
-    # Display text
-    text = "Lost" if lost else "Won" if game.mines == flags else ""
-    text = mediumFont.render(text, True, WHITE)
-    textRect = text.get_rect()
-    textRect.center = ((5 / 6) * width, (2 / 3) * height)
-    screen.blit(text, textRect)
+    # Moves the AI has chosen since the last frame
+    while True:
+        try:
+            owner, move, safe, mines = results.get_nowait()
+        except queue.Empty:
+            break
+        if owner is not ai:
+            continue
+        thinking = False
+        if move is None:
+            changed |= flags ^ mines
+            flags = mines
+            print("No moves left to make.")
+        else:
+            if safe:
+                print("AI making safe move.")
+            else:
+                print("No known safe moves, AI making random move.")
+            moves.append(move)
 
-    move = None
+    for click in clicks:
 
-    left, _, right = pygame.mouse.get_pressed()
+        # Check for a right-click to toggle flagging
+        if click.button == 3:
+            cell = cell_at(click.pos)
+            if cell is not None and not lost and cell not in revealed:
+                flags ^= {cell}
+                changed.add(cell)
 
-    # Check for a right-click to toggle flagging
-    if right == 1 and not lost:
-        mouse = pygame.mouse.get_pos()
-        for i in range(HEIGHT):
-            for j in range(WIDTH):
-                if cells[i][j].collidepoint(mouse) and (i, j) not in revealed:
-                    if (i, j) in flags:
-                        flags.remove((i, j))
-                    else:
-                        flags.add((i, j))
-                    time.sleep(0.2)
-
-    elif left == 1:
-        mouse = pygame.mouse.get_pos()
-
-        # If AI button clicked, make an AI move
-        if aiButton.collidepoint(mouse) and not lost:
-            move = ai.make_safe_move()
-            if move is None:
-                move = ai.make_random_move()
-                if move is None:
-                    flags = ai.mines.copy()
-                    print("No moves left to make.")
-                else:
-                    print("No known safe moves, AI making random move.")
-            else:
-                print("AI making safe move.")
-            time.sleep(0.2)
+        # If AI button clicked, ask the AI for a move
+        elif aiButton.collidepoint(click.pos):
+            if not lost and not thinking:
+                thinking = True
+                jobs.put((ai, None))
 
         # Reset game state
-        elif resetButton.collidepoint(mouse):
+        elif resetButton.collidepoint(click.pos):
             game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-            ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+            ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mines=MINES)
             revealed = set()
             flags = set()
             lost = False
-            continue
+            thinking = False
+            moves = []
+            redraw = True
 
         # User-made move
-        elif not lost:
-            for i in range(HEIGHT):
-                for j in range(WIDTH):
-                    if (cells[i][j].collidepoint(mouse)
-                            and (i, j) not in flags
-                            and (i, j) not in revealed):
-                        move = (i, j)
-
-    # Make move and update AI knowledge
-    if move:
+        else:
+            cell = cell_at(click.pos)
+            if cell is not None and cell not in flags:
+                moves.append(cell)
+
+    # Make moves, and have the AI update its knowledge in the background
+    for move in moves:
+        if lost or move in revealed:
+            continue
         if game.is_mine(move):
             lost = True
+            changed |= game.mines
         else:
-            nearby = game.nearby_mines(move)
             revealed.add(move)
-            ai.add_knowledge(move, nearby)
+            changed.add(move)
+            jobs.put((ai, (move, game.nearby_mines(move))))
 
-    pygame.display.flip()
+    # Repaint the screen, or only the cells that changed
+    if redraw:
+        screen.fill(BLACK)
+        for i in range(HEIGHT):
+            for j in range(WIDTH):
+                draw_cell((i, j))
+        draw_button(aiButton, "AI Move")
+        draw_button(resetButton, "Reset")
+        dirty = [screen.get_rect()]
+    else:
+        dirty = [draw_cell(cell) for cell in changed]
+    changed.clear()
+
+    # Display text
+    if redraw or dirty:
+        text = "Lost" if lost else "Won" if game.mines == flags else ""
+        if redraw or text != status:
+            status = text
+            pygame.draw.rect(screen, BLACK, statusRect)
+            text = mediumFont.render(text, True, WHITE)
+            textRect = text.get_rect()
+            textRect.center = statusRect.center
+            screen.blit(text, textRect)
+            dirty.append(statusRect)
+
+    if dirty:
+        pygame.display.update(dirty)
+    redraw = False
@@ -0,0 +1,194 @@
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+from minesweeper import Minesweeper, MinesweeperAI
+from bitboard import BitboardAI
+from board import Board
+
+
+# Beginner, intermediate and expert boards
+CONFIGS = ["8x8:8", "16x16:40", "16x30:99"]
+
+
+def parse_config(text):
+    """
+    Parse a board configuration "HxW:M" into (height, width, mines).
+    M is a number of mines, or a mine density if it has a decimal point.
+    """
+    size, _, mines = text.partition(":")
+    height, _, width = size.partition("x")
+    height, width = int(height), int(width)
+    if "." in mines:
+        mines = round(float(mines) * height * width)
+    mines = int(mines)
+    if not 0 < mines < height * width:
+        raise ValueError(f"{text}: mines must be between 0 and the board size")
+    return height, width, mines
+
+
+def play(height, width, mines, seed, bitboard=False, numpy=False,
+         record=None):
+    """
+    Play one game of an AI against a board, both drawn from `seed`.
+    `bitboard` selects BitboardAI, and `numpy` the NumPy-backed Board.
+    Return a dict of statistics: whether the game was won, the moves and
+    random guesses made, the time spent choosing moves and adding
+    knowledge, the mean and largest number of sentences known, and the
+    counters of the AI's `Stats`.
+
+    If `record` is a dict, the mines are stored in it as "layout", and
+    the moves as "moves", each (cell, count, guessed, seconds): the
+    number of mines next to the cell, or None if it was a mine, whether
+    it was a random guess, and the time spent adding its knowledge.
+    """
+    random.seed(seed)
+    game = (Board if numpy else Minesweeper)(
+        height=height, width=width, mines=mines
+    )
+    ai = (BitboardAI if bitboard else MinesweeperAI)(
+        height=height, width=width, mines=mines
+    )
+    moves = []
+    if record is not None:
+        record["layout"] = sorted(game.mines)
+        record["moves"] = moves
+
+    stats = {
+        "won": False, "moves": 0, "guesses": 0,
+        "move_time": 0.0, "inference_time": 0.0,
+        "knowledge": 0, "max_knowledge": 0
+    }
+    safe_cells = height * width - mines
+    while True:
+        start = time.perf_counter()
+        move = ai.make_safe_move()
+        guessed = move is None
+        if guessed:
+            move = ai.make_random_move()
+            stats["guesses"] += 1
+        stats["move_time"] += time.perf_counter() - start
+        if move is None:
+            break
+        if game.is_mine(move):
+            moves.append((move, None, guessed, 0.0))
+            break
+
+        count = game.nearby_mines(move)
+        start = time.perf_counter()
+        ai.add_knowledge(move, count)
+        elapsed = time.perf_counter() - start
+        moves.append((move, count, guessed, elapsed))
+        stats["inference_time"] += elapsed
+        stats["moves"] += 1
+        stats["knowledge"] += len(ai.knowledge)
+        stats["max_knowledge"] = max(stats["max_knowledge"], len(ai.knowledge))
+
+        if stats["moves"] == safe_cells:
+            stats["won"] = True
+            break
+
+    for name, value in ai.stats.counters().items():
+        stats.setdefault(name, value)
+    return stats
+
+
+def play_job(arguments):
+    """Unpack the arguments of a pool task for `play`."""
+    return arguments[0], play(*arguments[0], *arguments[1:])
+
+
+def summarize(results):
+    """Combine the statistics of many games into one summary."""
+    games = len(results)
+    moves = sum(stats["moves"] for stats in results)
+    elapsed = sum(stats["move_time"] + stats["inference_time"]
+                  for stats in results)
+    inference = sum(stats["inference_time"] for stats in results)
+    elimination = sum(stats["elimination_time"] for stats in results)
+    return {
+        "games": games,
+        "win_rate": sum(stats["won"] for stats in results) / games,
+        "moves": moves,
+        "guesses": sum(stats["guesses"] for stats in results),
+        "moves_per_second": moves / elapsed if elapsed else 0.0,
+        "inference_us_per_move": 1e6 * inference / moves if moves else 0.0,
+        "mean_knowledge": (sum(stats["knowledge"] for stats in results)
+                           / moves if moves else 0.0),
+        "max_knowledge": max(stats["max_knowledge"] for stats in results),
+        "rounds_per_move": (sum(stats["rounds"] for stats in results)
+                            / moves if moves else 0.0),
+        "subset_checks_per_move": (sum(stats["subset_checks"]
+                                       for stats in results)
+                                   / moves if moves else 0.0),
+        "sentences_created": sum(stats["sentences_created"]
+                                 for stats in results),
+        "sentences_pruned": sum(stats["sentences_pruned"]
+                                for stats in results),
+        "eliminations": sum(stats["eliminations"] for stats in results),
+        "cells_eliminated": sum(stats["cells_eliminated"]
+                                for stats in results),
+        "elimination_share": elimination / inference if inference else 0.0
+    }
+
+
+def main():
+    # Options are separated from the positional arguments
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    options = dict(
+        arg[2:].partition("=")[::2] for arg in sys.argv[1:]
+        if arg.startswith("--")
+    )
+
+    try:
+        configs = [parse_config(arg) for arg in args or CONFIGS]
+    except ValueError:
+        sys.exit("Incorrect command!!! Must enter in following format -> python simulate.py [HxW:MINES ...] [--games=N] [--seed=N] [--processes=N] [--bitboard] [--numpy] [--json=FILE]")
+
+    games = int(options.get("games") or 100)
+    seed = int(options.get("seed") or 0)
+    processes = int(options.get("processes") or os.cpu_count())
+    bitboard = "bitboard" in options
+    numpy = "numpy" in options
+
+    # Every configuration plays the same seeds
+    jobs = [
+        (config, seed + game, bitboard, numpy)
+        for config in configs for game in range(games)
+    ]
+    results = {config: [] for config in configs}
+    start = time.perf_counter()
+    with multiprocessing.Pool(processes) as pool:
+        for config, stats in pool.imap_unordered(play_job, jobs, chunksize=4):
+            results[config].append(stats)
+    elapsed = time.perf_counter() - start
+
+    summaries = dict()
+    for (height, width, mines), stats in results.items():
+        summary = summarize(stats)
+        summaries[f"{height}x{width}:{mines}"] = summary
+        print(f"{height}x{width} with {mines} mines: "
+              f"won {summary['win_rate']:.1%} of {summary['games']} games, "
+              f"{summary['moves_per_second']:.0f} moves/s, "
+              f"{summary['inference_us_per_move']:.0f}us inference per move, "
+              f"{summary['mean_knowledge']:.1f} sentences on average "
+              f"({summary['max_knowledge']} at most)")
+        print(f"    {summary['rounds_per_move']:.1f} inference rounds and "
+              f"{summary['subset_checks_per_move']:.1f} subset checks per move, "
+              f"{summary['sentences_created']} sentences created and "
+              f"{summary['sentences_pruned']} pruned, "
+              f"{summary['cells_eliminated']} cells found in "
+              f"{summary['eliminations']} eliminations "
+              f"({summary['elimination_share']:.0%} of inference time)")
+    print(f"{len(jobs)} games in {elapsed:.3f}s with {processes} processes")
+
+    if options.get("json"):
+        with open(options["json"], "w") as f:
+            json.dump(summaries, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()